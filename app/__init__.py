@@ -15,7 +15,7 @@ api = Api(app)
 db = SQLAlchemy(app)
 migrate = Migrate(app, db)
 
-from app import routes, models
+from app import routes, models, commands
 
 if not app.debug:
     stream_handler = logging.StreamHandler()
@@ -0,0 +1,126 @@
+from typing import Iterable
+
+from sqlalchemy import MetaData, func, text
+from sqlalchemy.dialects.postgresql import insert
+
+from app import db
+
+# Rows sent per INSERT statement
+BULK_CHUNK_SIZE = 500
+
+
+def upsert_rows(model, rows: Iterable[dict], chunk_size: int = BULK_CHUNK_SIZE,
+                keep_existing: Iterable[str] = ()) -> int:
+    """
+    Insert rows, updating every column of rows whose primary key already exists, with one
+    INSERT ... ON CONFLICT DO UPDATE statement per chunk. The caller commits the session.
+    :param model: Model class of the table
+    :param rows: Dictionaries of column values, e.g. from TeamModel.row
+    :param chunk_size: OPTIONAL, largest number of rows per statement
+    :param keep_existing: OPTIONAL, columns where a None in the new row keeps the stored value
+    :return: Number of rows written
+    """
+    keep_existing = set(keep_existing)
+    table = model.__table__
+    primary_key = [column.name for column in table.primary_key.columns]
+
+    # A statement may not change the same row twice, so keep only the last row for each key
+    unique_rows = list({tuple(row[column] for column in primary_key): row for row in rows}.values())
+
+    for start in range(0, len(unique_rows), chunk_size):
+        statement = insert(table).values(unique_rows[start:start + chunk_size])
+        statement = statement.on_conflict_do_update(
+            index_elements=primary_key,
+            set_={column.name: func.coalesce(statement.excluded[column.name], column)
+                  if column.name in keep_existing else statement.excluded[column.name]
+                  for column in table.columns if column.name not in primary_key}
+        )
+        db.session.execute(statement)
+
+    return len(unique_rows)
+
+
+def replace_tables(tables: list[tuple[object, Iterable[dict]]], chunk_size: int = BULK_CHUNK_SIZE) -> list[int]:
+    """
+    Replace every row of several tables in a single transaction. The rows are loaded into a staging copy of each
+    table, and the copies then take the place of the live tables, so readers see every table change at once
+    and only wait for the renames at the end. Commits the session.
+    :param tables: Model class and rows (dictionaries of column values) of each table
+    :param chunk_size: OPTIONAL, number of rows per executemany batch
+    :return: Number of rows loaded into each table
+    """
+    db.session.commit()
+
+    # Rebuilds running at the same time (cron overlapping a manual rebuild) would drop each other's staging
+    # tables, the second one waits here until the first commits. Sorted so two rebuilds never deadlock.
+    for name in sorted(model.__table__.name for model, _ in tables):
+        db.session.execute(text("SELECT pg_advisory_xact_lock(hashtext(:name))"), {'name': f"replace_table:{name}"})
+
+    counts = [load_staging(model, rows, chunk_size) for model, rows in tables]
+    for model, _ in tables:
+        swap_staging(model)
+
+    db.session.commit()
+    return counts
+
+
+def load_staging(model, rows: Iterable[dict], chunk_size: int = BULK_CHUNK_SIZE) -> int:
+    """
+    Load rows into a new staging copy of a table, with the same columns, defaults, constraints and indexes
+    :return: Number of rows loaded
+    """
+    table = model.__table__
+    staging = f"{table.name}_staging"
+
+    db.session.execute(text(f'DROP TABLE IF EXISTS "{staging}"'))
+    db.session.execute(text(f'CREATE TABLE "{staging}" (LIKE "{table.name}" INCLUDING ALL)'))
+    staging_table = table.to_metadata(MetaData(), name=staging)
+
+    rows = list(rows)
+    for start in range(0, len(rows), chunk_size):
+        db.session.execute(staging_table.insert(), rows[start:start + chunk_size])
+    return len(rows)
+
+
+def swap_staging(model):
+    """
+    Put the staging copy loaded by load_staging in place of the live table, which is dropped
+    """
+    table = model.__table__
+    live = table.name
+    staging = f"{live}_staging"
+    retired = f"{live}_retired"
+
+    live_indexes = {definition: name for name, definition in index_definitions(live).items()}
+    staging_indexes = index_definitions(staging)
+
+    db.session.execute(text(f'ALTER TABLE "{live}" RENAME TO "{retired}"'))
+    db.session.execute(text(f'ALTER TABLE "{staging}" RENAME TO "{live}"'))
+
+    # Serial columns share the retired table's sequence, which would be dropped with it
+    for column in table.columns:
+        sequence = db.session.execute(text("SELECT pg_get_serial_sequence(:table, :column)"),
+                                      {'table': retired, 'column': column.name}).scalar()
+        if sequence:
+            db.session.execute(text(f'ALTER SEQUENCE {sequence} OWNED BY "{live}"."{column.name}"'))
+
+    db.session.execute(text(f'DROP TABLE "{retired}"'))
+
+    # Copied indexes get generated names, give them the names of the matching indexes of the old table
+    for index_name, definition in staging_indexes.items():
+        live_name = live_indexes.get(definition)
+        if live_name and live_name != index_name:
+            db.session.execute(text(f'ALTER INDEX "{index_name}" RENAME TO "{live_name}"'))
+
+
+def index_definitions(table_name: str) -> dict[str, tuple[bool, str]]:
+    """
+    :param table_name: Name of a table
+    :return: Dictionary of index name -> (unique, method and columns), comparable between copies of a table
+    """
+    indexes = db.session.execute(text("SELECT indexname, indexdef FROM pg_indexes WHERE tablename = :table"),
+                                 {'table': table_name}).all()
+    return {
+        name: (definition.startswith('CREATE UNIQUE'), definition.split(' USING ', 1)[1])
+        for name, definition in indexes
+    }
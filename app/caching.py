@@ -0,0 +1,89 @@
+import datetime
+from functools import wraps
+
+from flask import Response, request
+from werkzeug.http import http_date
+
+from app import app, db
+from app.models import AppMetaData
+
+
+def dataset_version() -> datetime.datetime | None:
+    """
+    :return: Time the stored statistics last changed, None if it was never recorded
+    """
+    metadata = db.session.get(AppMetaData, 0)
+    if metadata is None:
+        return None
+    return metadata.data_updated or metadata.last_updated
+
+
+def cache_headers(version: datetime.datetime) -> dict:
+    """
+    :param version: Dataset version from dataset_version
+    :return: ETag, Last-Modified and Cache-Control headers for a response built from that version
+    """
+    # Versions are stored as naive UTC, timestamp() would read them as server-local time
+    version = version.replace(tzinfo=datetime.timezone.utc)
+    return {
+        'ETag': f'"{int(version.timestamp() * 1_000_000):x}"',
+        'Last-Modified': http_date(version),
+        'Cache-Control': f"public, max-age={app.config['CACHE_MAX_AGE']}, "
+                         f"s-maxage={app.config['CACHE_S_MAXAGE']}, "
+                         f"stale-while-revalidate={app.config['CACHE_STALE_WHILE_REVALIDATE']}"
+    }
+
+
+def gzip_etag(etag: str) -> str:
+    """
+    :param etag: ETag header of the plain response
+    :return: ETag of the gzip encoded response of the same version, so caches never mix up the two encodings
+    """
+    return '"' + etag.strip('"') + '-gz"'
+
+
+def is_fresh(version: datetime.datetime, etag: str) -> bool:
+    """
+    :param version: Dataset version from dataset_version
+    :param etag: ETag header of the current response
+    :return: True if the client's cached copy (If-None-Match, or If-Modified-Since without it) is still current
+    """
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag.strip('"'))
+
+    if request.if_modified_since:
+        return version.replace(tzinfo=datetime.timezone.utc, microsecond=0) <= request.if_modified_since
+
+    return False
+
+
+def conditional(fn):
+    """
+    Decorator for Resource methods whose response only depends on the stored statistics (and the URL).
+    Adds ETag, Last-Modified and Cache-Control headers and answers 304 Not Modified without calling the
+    method when the client already has the current version.
+    """
+
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        version = dataset_version()
+        if version is None:
+            return fn(*args, **kwargs)
+
+        headers = cache_headers(version)
+        for etag in (headers['ETag'], gzip_etag(headers['ETag'])):
+            if is_fresh(version, etag):
+                return Response(status=304, headers={**headers, 'ETag': etag})
+
+        response = fn(*args, **kwargs)
+        if isinstance(response, Response):
+            if response.headers.get('Content-Encoding') == 'gzip':
+                headers['ETag'] = gzip_etag(headers['ETag'])
+            response.headers.update(headers)
+            return response
+        if isinstance(response, tuple):
+            data, code, response_headers = (response + (200, {}))[:3]
+            return data, code, {**headers, **response_headers}
+        return response, 200, headers
+
+    return wrapper
@@ -0,0 +1,110 @@
+import time
+
+import click
+from sqlalchemy import distinct, select
+
+from app import app, db
+from app.bulk import replace_tables
+from app.match_store import SqlMatchStore, opr_state_rows
+from app.models import AllianceScoreModel, AppMetaData, EventModel, MatchModel, OprStateModel, TeamMatchStatsModel, \
+    TeamModel
+from app.snapshots import refresh_snapshots
+from stats.averages import average_scores, start_avg_max_date
+from stats.calculations import update_teams_at_events
+from stats.calculations.opr import IncrementalOprStore
+from stats.data.settings import get_settings
+from stats.teams.Team import Team
+
+
+def stored_event_codes(season: int) -> set[str]:
+    """
+    :param season: FTC API season year
+    :return: Codes of the events whose matches and scores are both in the match store
+    """
+    matches = db.session.execute(select(distinct(MatchModel.event_code)).where(MatchModel.season == season))
+    scores = db.session.execute(
+        select(distinct(AllianceScoreModel.event_code)).where(AllianceScoreModel.season == season))
+    return set(matches.scalars()) & set(scores.scalars())
+
+
+def stored_team_factory(missing: list[int]):
+    """
+    Create teams from the names and locations already in the teams table instead of the FIRST API
+    :param missing: Filled with the numbers of teams that aren't in the table, which get their number as name
+    :return: Function creating a team from its number and season
+    """
+    known = {row.team_number: row for row in db.session.execute(select(
+        TeamModel.team_number, TeamModel.team_name, TeamModel.country, TeamModel.state_province, TeamModel.city,
+        TeamModel.home_region))}
+
+    def create_team(team_number: int, season: int) -> Team:
+        row = known.get(team_number)
+        if row is None:
+            missing.append(team_number)
+            return Team(team_number, str(team_number), None, None, None, None)
+        return Team(team_number, row.team_name, row.country, row.state_province, row.city, row.home_region)
+
+    return create_team
+
+
+@app.cli.command('recompute-season')
+@click.option('--dry-run', is_flag=True, help="Calculate and report without writing the teams tables.")
+@click.option('--refresh', is_flag=True,
+              help="Download the matches and scores of the stored events again and store them over the old copy.")
+def recompute_season(dry_run: bool, refresh: bool):
+    """
+    Recalculate EPA and OPR of every team from the events, rosters, matches and scores stored in the
+    database, without any request to the FIRST API. Events must have been loaded by /api/events/calculate
+    and their matches by a previous team calculation. With --refresh, stored events are downloaded again,
+    which picks up scores corrected after they were stored.
+    """
+    start = time.perf_counter()
+    settings = get_settings()
+    season = settings.season
+
+    event_rows = EventModel.query.order_by(EventModel.date_start, EventModel.date_end, EventModel.event_code).all()
+    if any(row.date_start is None or row.date_end is None for row in event_rows):
+        raise click.ClickException("Some events have no dates, run /api/events/calculate once to store them.")
+
+    stored_codes = stored_event_codes(season)
+    events = [row.to_event(season) for row in event_rows if row.event_code in stored_codes]
+    print(f"Recomputing season {season} from {len(events)} stored events "
+          f"({len(event_rows) - len(events)} events without stored matches skipped)")
+    if not events:
+        raise click.ClickException("No stored matches, run /api/teams/calculate once to store them.")
+
+    match_store = SqlMatchStore()
+
+    # Start of season averages from the stored scores of early events
+    if settings.averages.use_predetermined:
+        avg_total, avg_auto, avg_tele = settings.averages.total, settings.averages.auto, settings.averages.tele
+    else:
+        max_date = start_avg_max_date(season)
+        early_codes = [row.event_code for row in event_rows
+                       if row.event_code in stored_codes and row.date_end.date() <= max_date]
+        early_events = match_store.load_season(season, early_codes)
+        avg_total, avg_auto, avg_tele = average_scores(event_data for _, event_data in early_events.values())
+
+    missing_teams: list[int] = []
+    teams = {}
+    opr_store = IncrementalOprStore()
+    update_teams_at_events(events, teams, avg_total, avg_auto, avg_tele, settings, match_store,
+                           stored_team_factory(missing_teams), opr_store, refresh)
+
+    if missing_teams:
+        print(f"{len(missing_teams)} teams are not in the teams table and were named after their number")
+    print(f"Calculated {len(teams)} teams in {time.perf_counter() - start:.1f}s")
+
+    if dry_run:
+        return
+
+    replace_tables([
+        (TeamModel, [TeamModel.row(team) for team in teams.values()]),
+        (TeamMatchStatsModel, [row for team in teams.values() for row in TeamMatchStatsModel.rows(team)]),
+        (OprStateModel, opr_state_rows(opr_store))
+    ])
+    AppMetaData.touch()
+    db.session.commit()
+    refresh_snapshots()
+
+    print(f"Season recompute complete in {time.perf_counter() - start:.1f}s")
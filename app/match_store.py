@@ -0,0 +1,84 @@
+from sqlalchemy import delete, insert, select, update
+
+from app import db
+from app.bulk import BULK_CHUNK_SIZE
+from app.models import AllianceScoreModel, EventModel, MatchModel, OprStateModel
+from stats.calculations.opr import IncrementalOpr, IncrementalOprStore
+from stats.calculations.pipeline import EventResources, MatchStore
+from stats.data.scores import EventData
+
+
+class SqlMatchStore(MatchStore):
+    """
+    MatchStore kept in the matches and alliance_scores tables, rosters in the team_list of event_model (which
+    holds the configured season). Saving doesn't commit, the caller commits the session with the rest of its update.
+    """
+
+    def __init__(self, chunk_size: int = BULK_CHUNK_SIZE):
+        """
+        :param chunk_size: OPTIONAL, number of rows per executemany batch when saving
+        """
+        self.chunk_size = chunk_size
+
+    def load_season(self, season: int, event_codes: list[str] = None) -> dict[str, tuple[list[dict], EventData]]:
+        match_query = select(MatchModel.__table__).where(MatchModel.season == season)
+        score_query = select(AllianceScoreModel.__table__).where(AllianceScoreModel.season == season)
+        if event_codes is not None:
+            match_query = match_query.where(MatchModel.event_code.in_(event_codes))
+            score_query = score_query.where(AllianceScoreModel.event_code.in_(event_codes))
+
+        matches: dict[str, list[dict]] = {}
+        for row in db.session.execute(match_query.order_by(
+                MatchModel.event_code, MatchModel.match_level, MatchModel.match_number)):
+            matches.setdefault(row.event_code, []).append(MatchModel.to_match(row))
+
+        # Both alliances of a match are next to each other, blue sorts before red
+        scores: dict[str, EventData] = {}
+        blue_row = None
+        for row in db.session.execute(score_query.order_by(
+                AllianceScoreModel.event_code, AllianceScoreModel.match_level, AllianceScoreModel.match_number,
+                AllianceScoreModel.alliance)):
+            if row.alliance == 'blue':
+                blue_row = row
+                continue
+            if blue_row is not None and (blue_row.event_code, blue_row.match_level, blue_row.match_number) == \
+                    (row.event_code, row.match_level, row.match_number):
+                scores.setdefault(row.event_code, EventData()).add(AllianceScoreModel.to_match(row, blue_row))
+            blue_row = None
+
+        # Only events saved whole are returned, anything else is downloaded again
+        return {event_code: (event_matches, scores[event_code])
+                for event_code, event_matches in matches.items() if event_code in scores}
+
+    def load_team_lists(self, season: int, event_codes: list[str]) -> dict[str, list[int]]:
+        rows = db.session.execute(select(EventModel.event_code, EventModel.team_list).where(
+            EventModel.event_code.in_(event_codes)))
+        return {row.event_code: list(row.team_list) for row in rows if row.team_list}
+
+    def save_event(self, resources: EventResources, season: int):
+        event_code = resources.event.event_code
+        db.session.execute(update(EventModel).where(EventModel.event_code == event_code).values(
+            team_list=list(resources.team_list)))
+        self._replace(MatchModel, season, event_code, MatchModel.rows(season, event_code, resources.matches))
+        self._replace(AllianceScoreModel, season, event_code, AllianceScoreModel.rows(resources.event_data))
+
+    def _replace(self, model, season: int, event_code: str, rows: list[dict]):
+        db.session.execute(delete(model).where(model.season == season, model.event_code == event_code))
+        for start in range(0, len(rows), self.chunk_size):
+            db.session.execute(insert(model), rows[start:start + self.chunk_size])
+
+
+def load_opr_state(season: int, event_code: str) -> IncrementalOpr | None:
+    """
+    Loader for IncrementalOprStore reading the opr_states table
+    :return: State saved for the event by a previous update, None if there is none
+    """
+    row = db.session.get(OprStateModel, (season, event_code))
+    return row.to_state() if row is not None else None
+
+
+def opr_state_rows(store: IncrementalOprStore) -> list[dict]:
+    """
+    :return: Rows of every state updated through the store, for upsert_rows or replace_tables on opr_states
+    """
+    return [OprStateModel.row(season, event_code, state) for season, event_code, state in store.updated()]
@@ -1,13 +1,17 @@
 from datetime import date
 import datetime
 
+import numpy as np
 from flask import jsonify
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import Column, DateTime
-from sqlalchemy.types import ARRAY, String, Integer, Float
+from sqlalchemy import Column, DateTime, Index, update
+from sqlalchemy.orm import deferred
+from sqlalchemy.types import ARRAY, JSON, String, Integer, Float, LargeBinary
 from flask_restful import fields
 
 from app import db
+from stats.calculations.opr import IncrementalOpr
+from stats.data.scores import AllianceScoreData, EventData, MatchData, parse_match_name
 from stats.events.Event import Event
 from stats.teams.Team import Team
 
@@ -15,7 +19,8 @@ from stats.teams.Team import Team
 
 meta_data_fields = {
     'id': fields.Integer,
-    'last_updated': fields.DateTime
+    'last_updated': fields.DateTime,
+    'data_updated': fields.DateTime
 }
 
 team_model_fields = {
@@ -26,23 +31,30 @@ team_model_fields = {
     'city': fields.String,
     'home_region': fields.String,
     'games_played': fields.Integer,
-    'matches': fields.List(fields.String),
 
     'epa_total': fields.Float,
     'auto_epa_total': fields.Float,
     'tele_epa_total': fields.Float,
-    'historical_epa': fields.List(fields.Float),
-    'historical_auto_epa': fields.List(fields.Float),
-    'historical_tele_epa': fields.List(fields.Float),
 
     'opr': fields.Float,
     'opr_auto': fields.Float,
     'opr_tele': fields.Float,
-    'opr_end': fields.Float,
-    'historical_opr': fields.List(fields.Float),
-    'historical_auto_opr': fields.List(fields.Float),
-    'historical_tele_opr': fields.List(fields.Float),
-    'historical_end_opr': fields.List(fields.Float)
+    'opr_end': fields.Float
+}
+
+team_match_stats_fields = {
+    'match_id': fields.String,
+    'match_index': fields.Integer,
+    'event_code': fields.String,
+
+    'epa_total': fields.Float,
+    'auto_epa_total': fields.Float,
+    'tele_epa_total': fields.Float,
+
+    'opr': fields.Float,
+    'opr_auto': fields.Float,
+    'opr_tele': fields.Float,
+    'opr_end': fields.Float
 }
 
 event_model_fields = {
@@ -61,22 +73,64 @@ class EventModel(db.Model):
     state_province = Column(String)
     city = Column(String)
     team_list = Column(ARRAY(Integer))
+    date_start = Column(DateTime)
+    date_end = Column(DateTime)
 
     def __init__(self, event: Event):
         self.update(event)
 
     def update(self, event: Event):
-        self.event_code = event.event_code
-        self.event_name = event.name
-        self.country = event.country
-        self.state_province = event.state_province
-        self.city = event.city
-        self.team_list = event.team_list
+        for column, value in self.row(event).items():
+            setattr(self, column, value)
+
+    @staticmethod
+    def row(event: Event) -> dict:
+        """
+        :param event: Event object
+        :return: Column values of the event's row, used for bulk inserts
+        """
+        return {
+            'event_code': event.event_code,
+            'event_name': event.name,
+            'country': event.country,
+            'state_province': event.state_province,
+            'city': event.city,
+            'team_list': event.team_list,
+            'date_start': datetime.datetime.fromisoformat(event.dateStart),
+            'date_end': datetime.datetime.fromisoformat(event.dateEnd)
+        }
+
+    def to_event(self, season: int) -> Event:
+        """
+        Build an Event from the stored row, without downloading anything
+        :param season: Season the event belongs to
+        :return: Event object with its roster already set
+        """
+        return Event({
+            'code': self.event_code,
+            'name': self.event_name,
+            'country': self.country,
+            'stateprov': self.state_province,
+            'city': self.city,
+            'dateStart': self.date_start.isoformat(),
+            'dateEnd': self.date_end.isoformat()
+        }, season, list(self.team_list or []))
+
+# Columns /api/teams/ can sort and filter by, each sort column has an index on (column, team_number)
+TEAM_SORT_COLUMNS = ('team_number', 'epa_total', 'auto_epa_total', 'tele_epa_total',
+                     'opr', 'opr_auto', 'opr_tele', 'opr_end')
+TEAM_FILTER_COLUMNS = ('country', 'state_province', 'home_region')
+
 
 class TeamModel(db.Model):
     """
-    Model used to define the shape of teams in the database with sqlalchemy
+    Model used to define the shape of teams in the database with sqlalchemy.
+    Matches and histories are kept in team_match_stats, one row per match, so team rows stay small
     """
+    __table_args__ = (
+        *(Index(f'ix_team_model_{column}_team_number', column, 'team_number') for column in TEAM_SORT_COLUMNS[1:]),
+        *(Index(f'ix_team_model_{column}', column) for column in TEAM_FILTER_COLUMNS),
+    )
 
     # General Info
     team_number = Column(Integer, primary_key=True)
@@ -86,62 +140,345 @@ class TeamModel(db.Model):
     city = Column(String)
     home_region = Column(String)
     games_played = Column(Integer)
-    matches = Column(ARRAY(String))
 
     # EPA
     epa_total = Column(Float)
     auto_epa_total = Column(Float)
     tele_epa_total = Column(Float)
-    historical_epa = Column(ARRAY(Float))
-    historical_auto_epa = Column(ARRAY(Float))
-    historical_tele_epa = Column(ARRAY(Float))
 
     # OPR
     opr = Column(Float)
     opr_auto = Column(Float)
     opr_tele = Column(Float)
     opr_end = Column(Float)
-    historical_opr = Column(ARRAY(Float))
-    historical_auto_opr = Column(ARRAY(Float))
-    historical_tele_opr = Column(ARRAY(Float))
-    historical_end_opr = Column(ARRAY(Float))
 
     def __init__(self, team: Team):
         self.update(team)
 
     def update(self, team: Team):
-        self.team_number = team.team_number
-        self.team_name = team.name
-        self.country = team.country
-        self.state_province = team.state_prov
-        self.city = team.city
-        self.home_region = team.home_region
-        self.games_played = team.games_played
-        self.matches = team.matches
-
-        self.epa_total = team.epa_total
-        self.auto_epa_total = team.epa_auto_total
-        self.tele_epa_total = team.epa_tele_total
-        self.historical_epa = team.historical_epa
-        self.historical_auto_epa = team.historical_auto_epa
-        self.historical_tele_epa = team.historical_tele_epa
-
-        self.opr = team.opr
-        self.opr_auto = team.opr_auto
-        self.opr_tele = team.opr_tele
-        self.opr_end = team.opr_end
-        self.historical_opr = team.historical_opr
-        self.historical_auto_opr = team.historical_auto_opr
-        self.historical_tele_opr = team.historical_tele_opr
-        self.historical_end_opr = team.historical_end_opr
+        for column, value in self.row(team).items():
+            setattr(self, column, value)
+
+    @staticmethod
+    def row(team: Team) -> dict:
+        """
+        :param team: Team object
+        :return: Column values of the team's row, used for bulk inserts
+        """
+        return {
+            'team_number': team.team_number,
+            'team_name': team.name,
+            'country': team.country,
+            'state_province': team.state_prov,
+            'city': team.city,
+            'home_region': team.home_region,
+            'games_played': team.games_played,
+
+            'epa_total': team.epa_total,
+            'auto_epa_total': team.epa_auto_total,
+            'tele_epa_total': team.epa_tele_total,
+
+            'opr': team.opr,
+            'opr_auto': team.opr_auto,
+            'opr_tele': team.opr_tele,
+            'opr_end': team.opr_end
+        }
+
+    def to_team(self, history: list['TeamMatchStatsModel']) -> Team:
+        """
+        Create a Team object holding the saved statistics, so calculations can continue from them
+        :param history: The team's team_match_stats rows, ordered by match_index
+        :return: Team object
+        """
+        team = Team(self.team_number, self.team_name, self.country, self.state_province, self.city, self.home_region)
+        team.games_played = self.games_played
+        team.matches = [row.match_id for row in history]
+
+        team.epa_total = self.epa_total
+        team.epa_auto_total = self.auto_epa_total
+        team.epa_tele_total = self.tele_epa_total
+        team.historical_epa = [row.epa_total for row in history]
+        team.historical_auto_epa = [row.auto_epa_total for row in history]
+        team.historical_tele_epa = [row.tele_epa_total for row in history]
+
+        # Every OPR point was saved on a match of the event it was calculated at
+        opr_history = [row for row in history if row.opr is not None]
+        team.opr = self.opr
+        team.opr_auto = self.opr_auto
+        team.opr_tele = self.opr_tele
+        team.opr_end = self.opr_end
+        team.historical_opr = [row.opr for row in opr_history]
+        team.historical_auto_opr = [row.opr_auto for row in opr_history]
+        team.historical_tele_opr = [row.opr_tele for row in opr_history]
+        team.historical_end_opr = [row.opr_end for row in opr_history]
+        team.opr_events = [row.event_code for row in opr_history]
+
+        return team
 
     def __repr__(self):
         return f"Team(number={self.team_number},name={self.team_name})"
 
 
+class TeamMatchStatsModel(db.Model):
+    """
+    EPA and OPR of a team after each match it played, one row per team and match
+    """
+    __tablename__ = "team_match_stats"
+    __table_args__ = (
+        Index('ix_team_match_stats_team_number_match_index', 'team_number', 'match_index', unique=True),
+    )
+
+    team_number = Column(Integer, primary_key=True, autoincrement=False)
+    match_id = Column(String, primary_key=True)
+    match_index = Column(Integer, nullable=False)  # Position in the team's list of matches, 0 is START
+    event_code = Column(String, index=True)
+
+    epa_total = Column(Float)
+    auto_epa_total = Column(Float)
+    tele_epa_total = Column(Float)
+
+    # Only set where a point of the team's OPR history can be placed on a match
+    opr = Column(Float)
+    opr_auto = Column(Float)
+    opr_tele = Column(Float)
+    opr_end = Column(Float)
+
+    @staticmethod
+    def rows(team: Team) -> list[dict]:
+        """
+        Split a team's histories into one row per match played.
+        EPA has a value for every match. OPR points are placed by the event recorded with them: an event with
+        one point per match played (match mode) gets one on every match, otherwise its latest point goes on
+        the event's last match. Matches no point can be placed on keep a None OPR.
+        :param team: Team object
+        :return: Column values of each row, used for bulk inserts
+        """
+        matches = team.matches
+        event_codes = []
+        for match_name in matches:
+            parts = parse_match_name(match_name)
+            event_codes.append(parts[1] if parts else None)
+
+        played_at: dict[str, list[int]] = {}
+        for index, event_code in enumerate(event_codes):
+            if event_code is not None:
+                played_at.setdefault(event_code, []).append(index)
+
+        opr_history = list(zip(team.historical_opr, team.historical_auto_opr, team.historical_tele_opr,
+                               team.historical_end_opr))
+        if len(team.opr_events) != len(opr_history):
+            raise ValueError(f"Team {team.team_number} has {len(opr_history)} OPR history points but "
+                             f"{len(team.opr_events)} OPR events, its OPR history can't be placed on its matches")
+
+        points_at: dict[str, list[tuple]] = {}
+        for event_code, point in zip(team.opr_events, opr_history):
+            points_at.setdefault(event_code, []).append(point)
+
+        opr_at = {}
+        for event_code, indices in played_at.items():
+            points = points_at.get(event_code)
+            if not points:
+                continue
+            if len(points) == len(indices):
+                opr_at.update(zip(indices, points))
+            else:
+                opr_at[indices[-1]] = points[-1]
+
+        rows = []
+        for index, (match_name, epa, auto_epa, tele_epa) in enumerate(zip(
+                matches, team.historical_epa, team.historical_auto_epa, team.historical_tele_epa)):
+            opr, opr_auto, opr_tele, opr_end = opr_at.get(index, (None, None, None, None))
+            rows.append({
+                'team_number': team.team_number,
+                'match_id': match_name,
+                'match_index': index,
+                'event_code': event_codes[index],
+                'epa_total': epa,
+                'auto_epa_total': auto_epa,
+                'tele_epa_total': tele_epa,
+                'opr': opr,
+                'opr_auto': opr_auto,
+                'opr_tele': opr_tele,
+                'opr_end': opr_end
+            })
+        return rows
+
+
+# Station of each team column of MatchModel, in the order build_game_matrix reads them
+MATCH_STATIONS = (('red_1', 'Red1'), ('red_2', 'Red2'), ('blue_1', 'Blue1'), ('blue_2', 'Blue2'))
+
+
+class MatchModel(db.Model):
+    """
+    Teams on each alliance of a match, as downloaded from the FIRST API matches endpoint
+    """
+    __tablename__ = "matches"
+
+    season = Column(Integer, primary_key=True, autoincrement=False)
+    event_code = Column(String, primary_key=True)
+    match_level = Column(String(1), primary_key=True)  # Q for qualification, P for playoffs
+    match_number = Column(Integer, primary_key=True, autoincrement=False)
+
+    red_1 = Column(Integer)
+    red_2 = Column(Integer)
+    blue_1 = Column(Integer)
+    blue_2 = Column(Integer)
+
+    @staticmethod
+    def rows(season: int, event_code: str, matches: list[dict]) -> list[dict]:
+        """
+        :param season: Season the event belongs to
+        :param event_code: Event code of the matches
+        :param matches: Matches as returned by the FIRST API matches endpoint
+        :return: Column values of each match's row, used for bulk inserts
+        """
+        rows = []
+        for match in matches:
+            stations = {team['station']: team['teamNumber'] for team in match['teams']}
+            row = {
+                'season': season,
+                'event_code': event_code,
+                'match_level': match.get('tournamentLevel', 'Q')[0].upper(),
+                'match_number': match['matchNumber']
+            }
+            for column, station in MATCH_STATIONS:
+                row[column] = stations.get(station)
+            rows.append(row)
+        return rows
+
+    @staticmethod
+    def to_match(row) -> dict:
+        """
+        :param row: Row of the matches table
+        :return: The match shaped like the FIRST API matches endpoint, as read by build_game_matrix
+        """
+        teams = [{'teamNumber': getattr(row, column), 'station': station}
+                 for column, station in MATCH_STATIONS if getattr(row, column) is not None]
+        return {'matchNumber': row.match_number, 'tournamentLevel': row.match_level, 'teams': teams}
+
+
+class AllianceScoreModel(db.Model):
+    """
+    Score breakdown of one alliance in a match, as produced by the season score parser
+    """
+    __tablename__ = "alliance_scores"
+
+    season = Column(Integer, primary_key=True, autoincrement=False)
+    event_code = Column(String, primary_key=True)
+    match_level = Column(String(1), primary_key=True)
+    match_number = Column(Integer, primary_key=True, autoincrement=False)
+    alliance = Column(String(4), primary_key=True)  # red or blue
+
+    total_score = Column(Integer)
+    auto_score = Column(Integer)
+    tele_score = Column(Integer)
+    end_score = Column(Integer)
+
+    @staticmethod
+    def rows(event_data: EventData) -> list[dict]:
+        """
+        :param event_data: Parsed scores of an event
+        :return: Column values of two rows per match, red alliance first, used for bulk inserts
+        """
+        rows = []
+        for match in event_data.matches:
+            for alliance, scores in (('red', match.red_alliance), ('blue', match.blue_alliance)):
+                rows.append({
+                    'season': match.season,
+                    'event_code': match.event_code,
+                    'match_level': match.match_level,
+                    'match_number': match.match_number,
+                    'alliance': alliance,
+                    'total_score': scores.total_score,
+                    'auto_score': scores.auto_score,
+                    'tele_score': scores.tele_score,
+                    'end_score': scores.end_score
+                })
+        return rows
+
+    @staticmethod
+    def to_match(red_row, blue_row) -> MatchData:
+        """
+        :param red_row: Row of the red alliance
+        :param blue_row: Row of the blue alliance of the same match
+        :return: MatchData of the match
+        """
+        return MatchData(
+            season=red_row.season,
+            event_code=red_row.event_code,
+            match_number=red_row.match_number,
+            match_level=red_row.match_level,
+            red_scores=AllianceScoreData(red_row.total_score, red_row.auto_score, red_row.tele_score,
+                                         red_row.end_score),
+            blue_scores=AllianceScoreData(blue_row.total_score, blue_row.auto_score, blue_row.tele_score,
+                                          blue_row.end_score)
+        )
+
+
+class OprStateModel(db.Model):
+    """
+    Incremental OPR state of an event (match mode), so the next update only applies the matches added since
+    """
+    __tablename__ = "opr_states"
+
+    season = Column(Integer, primary_key=True, autoincrement=False)
+    event_code = Column(String, primary_key=True)
+    prior = Column(Float, nullable=False)
+    team_list = Column(JSON, nullable=False)
+    matches_seen = Column(Integer, nullable=False)
+    applied = Column(JSON, nullable=False)  # match_key of every match applied, in order
+    # float64 arrays, (teams x teams) and (teams x components)
+    inverse = Column(LargeBinary, nullable=False)
+    opr = Column(LargeBinary, nullable=False)
+
+    @staticmethod
+    def row(season: int, event_code: str, state: IncrementalOpr) -> dict:
+        """
+        :return: Column values of the state, used for bulk inserts
+        """
+        return {
+            'season': season,
+            'event_code': event_code,
+            'prior': state.prior,
+            'team_list': [int(team_number) for team_number in state.team_list],
+            'matches_seen': state.matches_seen,
+            'applied': [[name, [int(team) for team in teams], [float(score) for score in scores]]
+                        for name, teams, scores in state.applied],
+            'inverse': state.inverse.astype(np.float64).tobytes(),
+            'opr': state.opr.astype(np.float64).tobytes()
+        }
+
+    def to_state(self) -> IncrementalOpr:
+        """
+        :return: The saved state, ready for the event's next matches
+        """
+        size = len(self.team_list)
+        state = IncrementalOpr(self.team_list, self.prior)
+        state.inverse = np.frombuffer(self.inverse, dtype=np.float64).reshape(size, size).copy()
+        state.opr = np.frombuffer(self.opr, dtype=np.float64).reshape(size, -1).copy()
+        state.matches_seen = self.matches_seen
+        # JSON has no tuples, match keys are compared as tuples
+        state.applied = [(name, tuple(teams), tuple(scores)) for name, teams, scores in self.applied]
+        return state
+
+
 class AppMetaData(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     last_updated = Column(db.DateTime, nullable=False, default=date.today().isoformat(), onupdate=date.today().isoformat())
+    # Last time any stored statistics changed, the version used for ETags
+    data_updated = Column(db.DateTime)
+
+    @classmethod
+    def touch(cls):
+        """
+        Record that the stored statistics changed, without moving last_updated (only the daily update does)
+        """
+        now = datetime.datetime.utcnow()
+        updated = db.session.execute(
+            update(cls).where(cls.id == 0).values(data_updated=now, last_updated=cls.last_updated)
+        ).rowcount
+        if not updated:
+            db.session.add(cls(id=0, data_updated=now))
 
 
 class PendingEventModel(db.Model):
@@ -151,3 +488,15 @@ class PendingEventModel(db.Model):
     first_seen = db.Column(db.DateTime, nullable=False)
     last_checked = db.Column(db.DateTime, nullable=True)
 
+
+class SnapshotModel(db.Model):
+    """
+    Pre-serialized response body of an endpoint, built once per dataset version
+    """
+    __tablename__ = "snapshots"
+
+    name = Column(String, primary_key=True)
+    version = Column(DateTime, nullable=False)  # AppMetaData.data_updated the body was built from
+    # Multi-MB bodies, only loaded when accessed so reading the version doesn't send both
+    identity = deferred(Column(LargeBinary, nullable=False))
+    gzip = deferred(Column(LargeBinary, nullable=False))
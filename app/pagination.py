@@ -0,0 +1,87 @@
+import base64
+import binascii
+import json
+
+from sqlalchemy import tuple_
+
+# Largest page a client may request
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(columns: list, values: list) -> str:
+    """
+    :param columns: Columns the page is ordered by
+    :param values: Sort key of the last row of a page
+    :return: Opaque cursor passed back by the client as the after parameter
+    """
+    cursor = {'columns': [column.key for column in columns], 'values': values}
+    return base64.urlsafe_b64encode(json.dumps(cursor).encode()).decode()
+
+
+def decode_cursor(cursor: str, columns: list) -> list:
+    """
+    :param cursor: Cursor created by encode_cursor
+    :param columns: Columns the requested page is ordered by
+    :return: Sort key encoded in the cursor
+    :raises ValueError: If the cursor was not created by encode_cursor for these columns
+    """
+    try:
+        decoded = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (binascii.Error, UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise ValueError("Invalid cursor.") from e
+
+    if not isinstance(decoded, dict) or not isinstance(decoded.get('values'), list):
+        raise ValueError("Invalid cursor.")
+    if decoded.get('columns') != [column.key for column in columns]:
+        raise ValueError("The cursor belongs to a different sort order.")
+
+    values = decoded['values']
+    if len(values) != len(columns):
+        raise ValueError("Invalid cursor.")
+    # A NULL in the row comparison matches no rows, which would silently end the paging
+    for column, value in zip(columns, values):
+        if value is None or not matches_type(column, value):
+            raise ValueError("Invalid cursor.")
+    return values
+
+
+def matches_type(column, value) -> bool:
+    """
+    :return: True if value can be compared with column, JSON integers are accepted for float columns
+    """
+    python_type = column.type.python_type
+    if isinstance(value, bool):
+        return False
+    if python_type is float:
+        return isinstance(value, (int, float))
+    return isinstance(value, python_type)
+
+
+def keyset_page(query, columns: list, descending: bool, after: str | None, limit: int):
+    """
+    Get one page of a query ordered by columns, starting after the row the cursor points at. The last
+    column must be unique so every row has a distinct position, and an index on the columns (in this order)
+    turns each page into a single index range scan.
+    :param query: Query to page through
+    :param columns: Columns to order by
+    :param descending: True to order every column from highest to lowest
+    :param after: OPTIONAL, cursor returned with the previous page
+    :param limit: Number of rows per page
+    :return: Tuple of the rows of the page and the cursor of the next page (None on the last page)
+    :raises ValueError: If the cursor is invalid
+    """
+    if after:
+        key = decode_cursor(after, columns)
+        position = tuple_(*columns)
+        query = query.filter(position < tuple_(*key) if descending else position > tuple_(*key))
+
+    query = query.order_by(*(column.desc() if descending else column.asc() for column in columns))
+
+    # Fetch one extra row to know whether there is another page
+    rows = query.limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(columns, [getattr(last, column.key) for column in columns])
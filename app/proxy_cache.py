@@ -0,0 +1,97 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Hashable
+
+from stats.data.memo import SingleFlight
+from stats.data.settings import get_settings
+
+
+class ProxyCache:
+    """
+    Short-lived cache of FIRST API payloads served by the event proxy endpoints.
+
+    Entries are fresh for the TTL of their resource. Concurrent misses for the same key share one upstream
+    request. Once an entry expires, the first request refreshes it inline while concurrent requests are served
+    the expired payload for up to stale_seconds, which is also served if the refresh fails. Nothing runs after
+    the response is sent, since a serverless instance (Vercel) can be frozen as soon as it is.
+    """
+
+    def __init__(self, max_entries: int = 512):
+        """
+        :param max_entries: Least recently used entries are evicted past this number
+        """
+        self.max_entries = max_entries
+        self._entries: OrderedDict[Hashable, tuple[object, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._flight = SingleFlight()
+        self._refreshing: set[Hashable] = set()
+
+    def get(self, key: Hashable, ttl: float, stale_seconds: float,
+            fetch: Callable[[], tuple[object, bool]]) -> tuple[object, str]:
+        """
+        :param key: Cache key, e.g. (season, event code, resource)
+        :param ttl: Seconds an entry is fresh
+        :param stale_seconds: Seconds past the TTL an entry is still served while it is refreshed, or if
+                              refreshing it fails
+        :param fetch: Function returning the payload and whether it should be cached (False for failures)
+        :return: Tuple of the payload and how it was served: HIT, STALE or MISS
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+
+        if entry is not None:
+            payload, fetched_at = entry
+            age = time.monotonic() - fetched_at
+            if age < ttl:
+                return payload, 'HIT'
+            if age < ttl + stale_seconds:
+                return self._refresh(key, fetch, payload)
+
+        return self._flight.do(key, lambda: self._fetch(key, fetch))[0], 'MISS'
+
+    def _fetch(self, key: Hashable, fetch: Callable[[], tuple[object, bool]]) -> tuple[object, bool]:
+        payload, cacheable = fetch()
+        if cacheable:
+            with self._lock:
+                self._entries[key] = (payload, time.monotonic())
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return payload, cacheable
+
+    def _refresh(self, key: Hashable, fetch: Callable[[], tuple[object, bool]], stale_payload) -> tuple[object, str]:
+        """
+        Refresh an expired entry in the current request, unless another request is already refreshing it
+        :return: Tuple of the payload and how it was served: MISS if refreshed, STALE otherwise
+        """
+        with self._lock:
+            if key in self._refreshing:
+                return stale_payload, 'STALE'
+            self._refreshing.add(key)
+
+        try:
+            payload, cacheable = self._flight.do(key, lambda: self._fetch(key, fetch))
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+        return (payload, 'MISS') if cacheable else (stale_payload, 'STALE')
+
+
+_cache: ProxyCache | None = None
+_cache_lock = threading.Lock()
+
+
+def get_proxy_cache() -> ProxyCache:
+    """
+    Get the shared proxy cache, configured from the [proxy] section of the config
+    :return: ProxyCache object
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ProxyCache(max_entries=get_settings().section('proxy').get('max_entries', 512))
+        return _cache
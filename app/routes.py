@@ -1,13 +1,26 @@
 import datetime
 
-from flask import render_template
-from flask_restful import Resource, marshal_with, abort
-from app.models import TeamModel, team_model_fields, event_model_fields, EventModel, AppMetaData, meta_data_fields
+from flask import render_template, request
+from flask_restful import Resource, marshal, marshal_with, abort
+from app.models import TeamModel, team_model_fields, event_model_fields, EventModel, AppMetaData, meta_data_fields, \
+    TeamMatchStatsModel, team_match_stats_fields, TEAM_SORT_COLUMNS, TEAM_FILTER_COLUMNS, OprStateModel
 
 from app import app, api, db
+from app.bulk import replace_tables, upsert_rows
+from app.caching import conditional
+from app.match_store import SqlMatchStore, load_opr_state, opr_state_rows
+from app.pagination import MAX_PAGE_SIZE, keyset_page
+from app.proxy_cache import get_proxy_cache
+from app.streaming import stream_json_array
+from app.snapshots import TEAMS_SNAPSHOT, accepts_gzip, get_snapshot, refresh_snapshots, snapshot_response
 from stats.data import parse_date
-from stats.events import get_all_events, Event as EventObj, event_has_teams, get_event_by_code
+from stats.events import get_all_events, Event as EventObj, event_has_teams, get_event_by_code, load_team_lists
 from stats.calculations import calculate_all_stats, update_teams_to_date
+from stats.calculations.opr import IncrementalOprStore
+from stats.data.client import get_client
+from stats.data.scheduler import Priority
+from stats.data.settings import get_settings
+from stats.events.catalog import reset_event_catalogs
 from app.models import PendingEventModel
 
 class MetaData(Resource):
@@ -23,11 +36,55 @@ class MetaData(Resource):
     #     return metadata
 
 class Teams(Resource):
-    @marshal_with(team_model_fields)
+    @conditional
     def get(self):
-        return TeamModel.query.all()
+        """
+        All teams, or a page of them when limit is given. Query parameters:
+        sort (one of TEAM_SORT_COLUMNS, default team_number), order (asc or desc), limit, after (the
+        X-Next-Cursor of the previous page) and the filters country, state_province and home_region.
+        Without query parameters the snapshot built by the last update is sent as is.
+        """
+        if not request.args:
+            use_gzip = accepts_gzip()
+            body = get_snapshot(TEAMS_SNAPSHOT, use_gzip)
+            if body is not None:
+                return snapshot_response(body, use_gzip)
+
+        query = TeamModel.query
+        for column in TEAM_FILTER_COLUMNS:
+            value = request.args.get(column)
+            if value:
+                query = query.filter(getattr(TeamModel, column) == value)
+
+        sort = request.args.get('sort', 'team_number')
+        if sort not in TEAM_SORT_COLUMNS:
+            abort(400, message=f"Teams can only be sorted by {', '.join(TEAM_SORT_COLUMNS)}.")
+        order = request.args.get('order', 'asc' if sort == 'team_number' else 'desc')
+        if order not in ('asc', 'desc'):
+            abort(400, message="The order must be asc or desc.")
+
+        # Team number breaks ties so every team has a distinct position
+        columns = [TeamModel.team_number] if sort == 'team_number' else [getattr(TeamModel, sort), TeamModel.team_number]
+        limit = request.args.get('limit')
+        if limit is not None:
+            try:
+                limit = int(limit)
+            except ValueError:
+                abort(400, message="The limit must be an integer.")
+        if limit is None:
+            query = query.order_by(*(column.desc() if order == 'desc' else column for column in columns))
+            return stream_json_array(query, team_model_fields)
+
+        try:
+            teams, next_cursor = keyset_page(query, columns, order == 'desc', request.args.get('after'),
+                                             max(1, min(limit, MAX_PAGE_SIZE)))
+        except ValueError as e:
+            abort(400, message=str(e))
+
+        return marshal(teams, team_model_fields), 200, {'X-Next-Cursor': next_cursor} if next_cursor else {}
 
 class Team(Resource):
+    @conditional
     @marshal_with(team_model_fields)
     def get(self, team_number):
         team = TeamModel.query.filter_by(team_number=team_number).first()
@@ -35,12 +92,38 @@ class Team(Resource):
             abort(404, message="The requested team was not found. Please try again.")
         return team
 
+class TeamHistory(Resource):
+    @conditional
+    @marshal_with(team_match_stats_fields)
+    def get(self, team_number):
+        """
+        EPA and OPR of a team after each match, optionally limited with the query parameters
+        start and end (match indexes, inclusive) and event (event code)
+        """
+        query = TeamMatchStatsModel.query.filter_by(team_number=team_number)
+
+        start = request.args.get('start', type=int)
+        end = request.args.get('end', type=int)
+        event_code = request.args.get('event')
+        if start is not None:
+            query = query.filter(TeamMatchStatsModel.match_index >= start)
+        if end is not None:
+            query = query.filter(TeamMatchStatsModel.match_index <= end)
+        if event_code:
+            query = query.filter_by(event_code=event_code)
+
+        history = query.order_by(TeamMatchStatsModel.match_index).all()
+        if not history and not TeamModel.query.filter_by(team_number=team_number).first():
+            abort(404, message="The requested team was not found. Please try again.")
+        return history
+
 class Events(Resource):
-    @marshal_with(event_model_fields)
+    @conditional
     def get(self):
-        return EventModel.query.all()
+        return stream_json_array(EventModel.query.order_by(EventModel.event_code), event_model_fields)
 
 class Event(Resource):
+    @conditional
     @marshal_with(event_model_fields)
     def get(self, event_code):
         event = EventModel.query.filter_by(event_code=event_code).first()
@@ -54,21 +137,17 @@ def index():
 
 @app.route('/api/events/calculate')
 def update_events():
-    with app.app_context():
-        print("Hard reset: deleting all event data")
-
-        # 1. DELETE EVERYTHING
-        db.session.query(EventModel).delete()
-        db.session.query(PendingEventModel).delete()
-        db.session.commit()
-
-        print("All event tables cleared")
+    with app.app_context(), get_client().run_scope():
+        print("Full rebuild: recalculating all events")
+        reset_event_catalogs()  # Download the season's event list once for this run
 
-        # 2. FETCH ALL EVENTS
+        # 1. FETCH ALL EVENTS AND THEIR ROSTERS
         events = get_all_events()
+        load_team_lists(events)
         seen_codes: set[str] = set()
 
-        processed = 0
+        event_rows = []
+        pending_rows = []
 
         for event in events:
             code = event.event_code
@@ -78,48 +157,54 @@ def update_events():
                 continue
             seen_codes.add(code)
 
-            if event_has_teams(code):
-                db.session.add(EventModel(event))
+            if event.team_list:
+                event_rows.append(EventModel.row(event))
             else:
-                db.session.add(
-                    PendingEventModel(
-                        event_code=code,
-                        first_seen=datetime.datetime.utcnow(),
-                        last_checked=datetime.datetime.utcnow()
-                    )
-                )
+                pending_rows.append({
+                    'event_code': code,
+                    'first_seen': datetime.datetime.utcnow(),
+                    'last_checked': datetime.datetime.utcnow()
+                })
                 print(f"{event} has no teams")
 
-            processed += 1
-            if processed % 25 == 0:
-                db.session.commit()
-
+        # 2. SWAP IN THE NEW TABLES TOGETHER, readers keep the old data until then
+        replace_tables([(EventModel, event_rows), (PendingEventModel, pending_rows)])
+        AppMetaData.touch()
         db.session.commit()
+        refresh_snapshots()
+
         print("Full rebuild complete")
+        print(get_client().report())
 
     return "", 204
 
 @app.route('/api/teams/calculate')
 def update_teams():
-    with app.app_context():
-        print("Hard reset: recalculating all teams")
-
-        db.session.query(TeamModel).delete()
+    with app.app_context(), get_client().run_scope():
+        print("Full rebuild: recalculating all teams")
+        reset_event_catalogs()  # Download the season's event list once for this run
+
+        # Teams start from scratch, so every match is applied again instead of resuming saved OPR states
+        opr_store = IncrementalOprStore()
+        teams = calculate_all_stats(match_store=SqlMatchStore(), opr_store=opr_store)
+        replace_tables([
+            (TeamModel, [TeamModel.row(team) for team in teams.values()]),
+            (TeamMatchStatsModel, [row for team in teams.values() for row in TeamMatchStatsModel.rows(team)]),
+            (OprStateModel, opr_state_rows(opr_store))
+        ])
+        AppMetaData.touch()
         db.session.commit()
+        refresh_snapshots()
 
-        teams = calculate_all_stats()
-
-        for team in teams.values():
-            db.session.add(TeamModel(team))
-
-        db.session.commit()
         print("Team rebuild complete")
+        print(get_client().report())
 
     return "", 204
 
 @app.route('/api/cron/update')
 def update_daily():
-    with app.app_context():
+    with app.app_context(), get_client().run_scope():
+        reset_event_catalogs()  # Download the season's event list once for this run
 
         metadata = AppMetaData.query.get(0)
         last_updated = metadata.last_updated
@@ -132,16 +217,17 @@ def update_daily():
         PendingEventModel.query.delete()
         db.session.commit()
 
-        # 3. Do ALL heavy work without DB
+        # 3. Do ALL heavy work without DB, events resume from their saved OPR states
+        opr_store = IncrementalOprStore(load_opr_state)
         valid_events, teams, still_pending = update_teams_to_date(
             last_updated,
-            pending_codes
+            pending_codes,
+            match_store=SqlMatchStore(),
+            opr_store=opr_store
         )
 
         # 4. Commit events
-        for event in valid_events:
-            if not EventModel.query.filter_by(event_code=event.event_code).first():
-                db.session.add(EventModel(event))
+        upsert_rows(EventModel, [EventModel.row(event) for event in valid_events])
 
         # 5. Commit pending events
         for code in still_pending:
@@ -152,15 +238,16 @@ def update_daily():
             ))
 
         # 6. Commit teams
-        for team in teams.values():
-            existing = TeamModel.query.filter_by(team_number=team.team_number).first()
-            if existing:
-                existing.update(team)
-            else:
-                db.session.add(TeamModel(team))
+        upsert_rows(TeamModel, [TeamModel.row(team) for team in teams.values()])
+        upsert_rows(TeamMatchStatsModel, [row for team in teams.values() for row in TeamMatchStatsModel.rows(team)],
+                    keep_existing=('opr', 'opr_auto', 'opr_tele', 'opr_end'))
+        upsert_rows(OprStateModel, opr_state_rows(opr_store))
 
         metadata.last_updated = datetime.datetime.utcnow()
+        metadata.data_updated = metadata.last_updated
         db.session.commit()
+        refresh_snapshots()
+        print(get_client().report())
 
     return "", 204
 
@@ -190,74 +277,75 @@ def process_pending_events():
         db.session.delete(pending)
 
 
+# Path below the season, query string parameters and key of the returned list for each proxied resource
+PROXY_RESOURCES = {
+    'matches': ("matches/{event_code}", {'tournamentLevel': 'qual'}, "matches"),
+    'scores': ("scores/{event_code}/qual", {}, "matchScores"),
+    'schedule': ("schedule/{event_code}", {'tournamentLevel': 'qual'}, "schedule"),
+}
+
+
+def fetch_first_api(path: str, params: dict, empty_key: str) -> tuple[dict, bool]:
+    """
+    Forward a request to the FIRST API through the shared client, returning an empty payload on failure
+    :param path: API path including the season (e.g. /2024/matches/USCAFFQ)
+    :param params: Query string parameters
+    :param empty_key: Key of the list returned when the upstream call fails
+    :return: Tuple of the payload and whether the request succeeded
+    """
+    try:
+        response = get_client().get(path, params=params, timeout=10, priority=Priority.INTERACTIVE)
+        if response.status_code != 200:
+            return {
+                empty_key: [],
+                "error": f"FIRST API returned status {response.status_code}",
+                "url": response.url,
+                "response_text": response.text
+            }, False
+        return response.json(), True
+    except Exception as e:
+        return {"error": str(e), empty_key: []}, False
+
+
+def proxy_first_api(resource: str, event_code: str):
+    """
+    Serve an event resource from the FIRST API, cached per (season, event, resource) for the TTL
+    configured in the [proxy] section. Failed requests are returned but never cached.
+    :param resource: Key of PROXY_RESOURCES
+    :param event_code: Valid FTC Event Code
+    """
+    settings = get_settings()
+    season = settings.season
+    proxy_config = settings.section('proxy')
+
+    path, params, empty_key = PROXY_RESOURCES[resource]
+    payload, status = get_proxy_cache().get(
+        (season, event_code, resource),
+        ttl=proxy_config.get('ttl_seconds', {}).get(resource, 15),
+        stale_seconds=proxy_config.get('stale_seconds', 60),
+        fetch=lambda: fetch_first_api(f"/{season}/{path.format(event_code=event_code)}", params, empty_key)
+    )
+    return payload, 200, {'X-Cache': status}
+
+
 class EventMatches(Resource):
     def get(self, event_code):
-        import requests
-        from stats.data import get_config, get_auth
-        try:
-            config = get_config()
-            season = config['season'] if config else 2025
-            auth = get_auth()
-            url = f"https://ftc-api.firstinspires.org/v2.0/{season}/matches/{event_code}?tournamentLevel=qual"
-            response = requests.get(url, auth=auth, timeout=10)
-            if response.status_code != 200:
-                return {
-                    "matches": [],
-                    "error": f"FIRST API returned status {response.status_code}",
-                    "url": url,
-                    "response_text": response.text
-                }, 200
-            return response.json(), 200
-        except Exception as e:
-            return {"error": str(e), "matches": []}, 200
+        return proxy_first_api('matches', event_code)
 
 
 class EventScores(Resource):
     def get(self, event_code):
-        import requests
-        from stats.data import get_config, get_auth
-        try:
-            config = get_config()
-            season = config['season'] if config else 2025
-            auth = get_auth()
-            url = f"https://ftc-api.firstinspires.org/v2.0/{season}/scores/{event_code}/qual"
-            response = requests.get(url, auth=auth, timeout=10)
-            if response.status_code != 200:
-                return {
-                    "matchScores": [],
-                    "error": f"FIRST API returned status {response.status_code}",
-                    "url": url,
-                    "response_text": response.text
-                }, 200
-            return response.json(), 200
-        except Exception as e:
-            return {"error": str(e), "matchScores": []}, 200
+        return proxy_first_api('scores', event_code)
 
 
 class EventSchedule(Resource):
     def get(self, event_code):
-        import requests
-        from stats.data import get_config, get_auth
-        try:
-            config = get_config()
-            season = config['season'] if config else 2025
-            auth = get_auth()
-            url = f"https://ftc-api.firstinspires.org/v2.0/{season}/schedule/{event_code}?tournamentLevel=qual"
-            response = requests.get(url, auth=auth, timeout=10)
-            if response.status_code != 200:
-                return {
-                    "schedule": [],
-                    "error": f"FIRST API returned status {response.status_code}",
-                    "url": url,
-                    "response_text": response.text
-                }, 200
-            return response.json(), 200
-        except Exception as e:
-            return {"error": str(e), "schedule": []}, 200
+        return proxy_first_api('schedule', event_code)
 
 
 api.add_resource(Teams, '/api/teams/')
 api.add_resource(Team, '/api/teams/<int:team_number>/')
+api.add_resource(TeamHistory, '/api/teams/<int:team_number>/history/')
 api.add_resource(Events, '/api/events/')
 api.add_resource(Event, '/api/events/<string:event_code>/')
 api.add_resource(EventMatches, '/api/events/<string:event_code>/matches/')
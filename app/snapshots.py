@@ -0,0 +1,75 @@
+import gzip
+
+from flask import Response, request
+from sqlalchemy import select
+
+from app import db
+from app.bulk import upsert_rows
+from app.caching import dataset_version
+from app.models import SnapshotModel, TeamModel, team_model_fields
+from app.streaming import json_array_chunks
+
+TEAMS_SNAPSHOT = 'teams'
+
+
+def build_snapshot(name: str, body: bytes) -> int:
+    """
+    Store a response body, plain and gzip compressed, for the current dataset version.
+    The caller commits the session.
+    :param name: Name of the snapshot
+    :param body: Serialized response body
+    :return: Size of the uncompressed body in bytes
+    """
+    upsert_rows(SnapshotModel, [{
+        'name': name,
+        'version': dataset_version(),
+        'identity': body,
+        'gzip': gzip.compress(body, compresslevel=9)
+    }])
+    return len(body)
+
+
+def refresh_snapshots():
+    """
+    Rebuild every snapshot from the stored statistics, call after AppMetaData.touch()
+    """
+    # Same encoder as the streamed response, so the snapshot is byte for byte what the live endpoint sends
+    query = TeamModel.query.order_by(TeamModel.team_number)
+    size = build_snapshot(TEAMS_SNAPSHOT, "".join(json_array_chunks(query, team_model_fields)).encode())
+    db.session.commit()
+    print(f"Teams snapshot: {size} bytes")
+
+
+def accepts_gzip() -> bool:
+    """
+    :return: True if the client of the current request accepts gzip encoded responses
+    """
+    return request.accept_encodings['gzip'] > 0
+
+
+def get_snapshot(name: str, use_gzip: bool) -> bytes | None:
+    """
+    Read a single encoding of a snapshot, the other one is never sent by the database
+    :param name: Name of the snapshot
+    :param use_gzip: True for the gzip body, False for the plain body
+    :return: The body, None if the snapshot is missing or was built from an older version of the data
+    """
+    version = db.session.execute(select(SnapshotModel.version).where(SnapshotModel.name == name)).scalar()
+    if version is None or version != dataset_version():
+        return None
+
+    body_column = SnapshotModel.gzip if use_gzip else SnapshotModel.identity
+    return db.session.execute(select(body_column).where(SnapshotModel.name == name)).scalar()
+
+
+def snapshot_response(body: bytes, use_gzip: bool) -> Response:
+    """
+    :param body: Snapshot body from get_snapshot
+    :param use_gzip: True if body is the gzip body
+    :return: Response sending the body with the matching Content-Encoding
+    """
+    response = Response(body, mimetype='application/json')
+    if use_gzip:
+        response.headers['Content-Encoding'] = 'gzip'
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
@@ -0,0 +1,37 @@
+import json
+from typing import Iterator
+
+from flask import Response, stream_with_context
+from flask_restful import marshal
+
+# Rows fetched from the server-side cursor and encoded per chunk of output
+STREAM_BATCH_SIZE = 500
+
+
+def json_array_chunks(query, fields: dict, batch_size: int = STREAM_BATCH_SIZE) -> Iterator[str]:
+    """
+    Encode the rows of a query as a JSON array, one batch of rows at a time. Rows are read with yield_per
+    (a server-side cursor on PostgreSQL), so memory use does not grow with the number of rows.
+    :param query: Query of the rows, already ordered
+    :param fields: flask_restful fields used to marshal each row
+    :param batch_size: OPTIONAL, rows per fetch and per chunk
+    :return: Generator of strings that together form the JSON array
+    """
+    yield "["
+    separator = ""
+    parts = []
+    for row in query.yield_per(batch_size):
+        parts.append(separator + json.dumps(marshal(row, fields)))
+        separator = ", "
+        if len(parts) == batch_size:
+            yield "".join(parts)
+            parts = []
+    parts.append("]\n")
+    yield "".join(parts)
+
+
+def stream_json_array(query, fields: dict, batch_size: int = STREAM_BATCH_SIZE) -> Response:
+    """
+    :return: Response streaming the rows of a query as a JSON array while they are read from the database
+    """
+    return Response(stream_with_context(json_array_chunks(query, fields, batch_size)), mimetype='application/json')
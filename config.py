@@ -7,4 +7,9 @@ load_dotenv()
 class Config:
     SECRET_KEY = os.getenv('SECRET_KEY', os.urandom(24))
     SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_POSTGRES_URL')
-    SQLALCHEMY_TRACK_MODIFICATIONS = False
\ No newline at end of file
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Cache headers of the statistics endpoints, in seconds
+    CACHE_MAX_AGE = int(os.getenv('CACHE_MAX_AGE', 60))  # Browsers
+    CACHE_S_MAXAGE = int(os.getenv('CACHE_S_MAXAGE', 600))  # Shared caches such as the Vercel edge
+    CACHE_STALE_WHILE_REVALIDATE = int(os.getenv('CACHE_STALE_WHILE_REVALIDATE', 86400))
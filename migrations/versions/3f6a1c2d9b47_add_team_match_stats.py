@@ -0,0 +1,44 @@
+"""add team_match_stats
+
+Revision ID: 3f6a1c2d9b47
+Revises: 
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f6a1c2d9b47'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('team_match_stats',
+    sa.Column('team_number', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('match_id', sa.String(), nullable=False),
+    sa.Column('match_index', sa.Integer(), nullable=False),
+    sa.Column('event_code', sa.String(), nullable=True),
+    sa.Column('epa_total', sa.Float(), nullable=True),
+    sa.Column('auto_epa_total', sa.Float(), nullable=True),
+    sa.Column('tele_epa_total', sa.Float(), nullable=True),
+    sa.Column('opr', sa.Float(), nullable=True),
+    sa.Column('opr_auto', sa.Float(), nullable=True),
+    sa.Column('opr_tele', sa.Float(), nullable=True),
+    sa.Column('opr_end', sa.Float(), nullable=True),
+    sa.PrimaryKeyConstraint('team_number', 'match_id')
+    )
+    with op.batch_alter_table('team_match_stats', schema=None) as batch_op:
+        batch_op.create_index('ix_team_match_stats_team_number_match_index', ['team_number', 'match_index'], unique=True)
+        batch_op.create_index(batch_op.f('ix_team_match_stats_event_code'), ['event_code'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('team_match_stats', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_team_match_stats_event_code'))
+        batch_op.drop_index('ix_team_match_stats_team_number_match_index')
+
+    op.drop_table('team_match_stats')
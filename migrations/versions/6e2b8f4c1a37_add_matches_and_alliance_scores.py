@@ -0,0 +1,47 @@
+"""add matches and alliance_scores
+
+Revision ID: 6e2b8f4c1a37
+Revises: d41f7c8e2a93
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6e2b8f4c1a37'
+down_revision = 'd41f7c8e2a93'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('matches',
+    sa.Column('season', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('event_code', sa.String(), nullable=False),
+    sa.Column('match_level', sa.String(length=1), nullable=False),
+    sa.Column('match_number', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('red_1', sa.Integer(), nullable=True),
+    sa.Column('red_2', sa.Integer(), nullable=True),
+    sa.Column('blue_1', sa.Integer(), nullable=True),
+    sa.Column('blue_2', sa.Integer(), nullable=True),
+    sa.PrimaryKeyConstraint('season', 'event_code', 'match_level', 'match_number')
+    )
+    op.create_table('alliance_scores',
+    sa.Column('season', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('event_code', sa.String(), nullable=False),
+    sa.Column('match_level', sa.String(length=1), nullable=False),
+    sa.Column('match_number', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('alliance', sa.String(length=4), nullable=False),
+    sa.Column('total_score', sa.Integer(), nullable=True),
+    sa.Column('auto_score', sa.Integer(), nullable=True),
+    sa.Column('tele_score', sa.Integer(), nullable=True),
+    sa.Column('end_score', sa.Integer(), nullable=True),
+    sa.PrimaryKeyConstraint('season', 'event_code', 'match_level', 'match_number', 'alliance')
+    )
+
+
+def downgrade():
+    op.drop_table('alliance_scores')
+    op.drop_table('matches')
@@ -0,0 +1,34 @@
+"""add team_model sort and filter indexes
+
+Revision ID: 8c2e4b7a1d05
+Revises: 3f6a1c2d9b47
+Create Date: 2026-10-18 16:10:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '8c2e4b7a1d05'
+down_revision = '3f6a1c2d9b47'
+branch_labels = None
+depends_on = None
+
+SORT_COLUMNS = ('epa_total', 'auto_epa_total', 'tele_epa_total', 'opr', 'opr_auto', 'opr_tele', 'opr_end')
+FILTER_COLUMNS = ('country', 'state_province', 'home_region')
+
+
+def upgrade():
+    with op.batch_alter_table('team_model', schema=None) as batch_op:
+        for column in SORT_COLUMNS:
+            batch_op.create_index(f'ix_team_model_{column}_team_number', [column, 'team_number'], unique=False)
+        for column in FILTER_COLUMNS:
+            batch_op.create_index(f'ix_team_model_{column}', [column], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('team_model', schema=None) as batch_op:
+        for column in FILTER_COLUMNS:
+            batch_op.drop_index(f'ix_team_model_{column}')
+        for column in SORT_COLUMNS:
+            batch_op.drop_index(f'ix_team_model_{column}_team_number')
@@ -0,0 +1,41 @@
+"""trim team_model histories, kept in team_match_stats
+
+Revision ID: 9d4e2a6f8c13
+Revises: e5a9c3b7d2f1
+Create Date: 2026-10-18 20:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '9d4e2a6f8c13'
+down_revision = 'e5a9c3b7d2f1'
+branch_labels = None
+depends_on = None
+
+HISTORY_COLUMNS = (
+    ('matches', sa.String()),
+    ('historical_epa', sa.Float()),
+    ('historical_auto_epa', sa.Float()),
+    ('historical_tele_epa', sa.Float()),
+    ('historical_opr', sa.Float()),
+    ('historical_auto_opr', sa.Float()),
+    ('historical_tele_opr', sa.Float()),
+    ('historical_end_opr', sa.Float()),
+    ('historical_opr_events', sa.String()),
+)
+
+
+def upgrade():
+    with op.batch_alter_table('team_model', schema=None) as batch_op:
+        for name, _ in HISTORY_COLUMNS:
+            batch_op.drop_column(name)
+
+
+def downgrade():
+    with op.batch_alter_table('team_model', schema=None) as batch_op:
+        for name, item_type in HISTORY_COLUMNS:
+            batch_op.add_column(sa.Column(name, postgresql.ARRAY(item_type), nullable=True))
@@ -0,0 +1,28 @@
+"""add event_model dates
+
+Revision ID: a7d3e5c90b18
+Revises: 6e2b8f4c1a37
+Create Date: 2026-10-18 17:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7d3e5c90b18'
+down_revision = '6e2b8f4c1a37'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('event_model', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('date_start', sa.DateTime(), nullable=True))
+        batch_op.add_column(sa.Column('date_end', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('event_model', schema=None) as batch_op:
+        batch_op.drop_column('date_end')
+        batch_op.drop_column('date_start')
@@ -0,0 +1,29 @@
+"""add app_meta_data.data_updated
+
+Revision ID: b5d93e0f4a6c
+Revises: 8c2e4b7a1d05
+Create Date: 2026-10-18 16:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b5d93e0f4a6c'
+down_revision = '8c2e4b7a1d05'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('app_meta_data', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('data_updated', sa.DateTime(), nullable=True))
+
+    # Start from the last daily update so existing data gets a version right away
+    op.execute("UPDATE app_meta_data SET data_updated = last_updated")
+
+
+def downgrade():
+    with op.batch_alter_table('app_meta_data', schema=None) as batch_op:
+        batch_op.drop_column('data_updated')
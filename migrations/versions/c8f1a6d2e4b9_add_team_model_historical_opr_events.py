@@ -0,0 +1,27 @@
+"""add team_model historical_opr_events
+
+Revision ID: c8f1a6d2e4b9
+Revises: a7d3e5c90b18
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'c8f1a6d2e4b9'
+down_revision = 'a7d3e5c90b18'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('team_model', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('historical_opr_events', postgresql.ARRAY(sa.String()), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('team_model', schema=None) as batch_op:
+        batch_op.drop_column('historical_opr_events')
@@ -0,0 +1,30 @@
+"""add snapshots
+
+Revision ID: d41f7c8e2a93
+Revises: b5d93e0f4a6c
+Create Date: 2026-10-18 16:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd41f7c8e2a93'
+down_revision = 'b5d93e0f4a6c'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('snapshots',
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('version', sa.DateTime(), nullable=False),
+    sa.Column('identity', sa.LargeBinary(), nullable=False),
+    sa.Column('gzip', sa.LargeBinary(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade():
+    op.drop_table('snapshots')
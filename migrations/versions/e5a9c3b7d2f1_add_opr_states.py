@@ -0,0 +1,34 @@
+"""add opr_states
+
+Revision ID: e5a9c3b7d2f1
+Revises: c8f1a6d2e4b9
+Create Date: 2026-10-18 19:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5a9c3b7d2f1'
+down_revision = 'c8f1a6d2e4b9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('opr_states',
+    sa.Column('season', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('event_code', sa.String(), nullable=False),
+    sa.Column('prior', sa.Float(), nullable=False),
+    sa.Column('team_list', sa.JSON(), nullable=False),
+    sa.Column('matches_seen', sa.Integer(), nullable=False),
+    sa.Column('applied', sa.JSON(), nullable=False),
+    sa.Column('inverse', sa.LargeBinary(), nullable=False),
+    sa.Column('opr', sa.LargeBinary(), nullable=False),
+    sa.PrimaryKeyConstraint('season', 'event_code')
+    )
+
+
+def downgrade():
+    op.drop_table('opr_states')
@@ -1,26 +1,28 @@
 from datetime import date
-from stats.data import get_config, get_season_score_parser
+from typing import Iterable
+
+from stats.data import get_season_score_parser
 from stats.data.scores import EventData
+from stats.data.settings import Settings, get_settings
 from stats.events import get_all_events
 
 
-def calculate_start_avg():
+def start_avg_max_date(season: int) -> date:
     """
-    Calculates the start of the season average for use in EPA calculations
-    :return: Average total score, average auto score, average teleop score
+    :param season: FTC API season year
+    :return: Last end date of the events used for the start of the season average
     """
-    season = get_config()['season']
+    return date(season, 11, 30)
 
-    max_date = date(season, 11, 30) # Set a max date to consider events
-    events = get_all_events(max_date=max_date)
 
+def average_scores(event_data_list: Iterable[EventData]):
+    """
+    Average the scores of every match of the given events
+    :param event_data_list: Parsed scores of each event
+    :return: Average total score, average auto score, average teleop score
+    """
     num_scores = avg_total = avg_auto = avg_teleop = 0
-    # Find the averages in the first number of events
-    print(len(events))
-    for event in events:
-        print(event.event_code)
-        event_code = event.event_code
-        event_data: EventData = get_season_score_parser(season).parse(event_code)
+    for event_data in event_data_list:
         num_scores += len(event_data.matches) * 2 # Multiply the number of matches by two (to account for red AND blue alliances)
         avg_total += sum(event_data.total_match_scores)
         avg_auto += sum(event_data.auto_match_scores)
@@ -38,22 +40,48 @@ def calculate_start_avg():
     return avg_total, avg_auto, avg_teleop
 
 
-def get_start_avg():
+def calculate_start_avg(settings: Settings = None):
+    """
+    Calculates the start of the season average for use in EPA calculations
+    :param settings: OPTIONAL, settings to use instead of the configured ones
+    :return: Average total score, average auto score, average teleop score
+    """
+    if settings is None:
+        settings = get_settings()
+    season = settings.season
+
+    max_date = start_avg_max_date(season) # Set a max date to consider events
+    events = get_all_events(max_date=max_date, settings=settings)
+
+    # Find the averages in the first number of events
+    print(len(events))
+
+    def parse_events():
+        for event in events:
+            print(event.event_code)
+            yield get_season_score_parser(season).parse(event.event_code)
+
+    return average_scores(parse_events())
+
+
+def get_start_avg(settings: Settings = None):
     """
+    :param settings: OPTIONAL, settings to use instead of the configured ones
     :return: Average total score, average auto score, average teleop score for early events
     """
-    config = get_config()
+    if settings is None:
+        settings = get_settings()
 
     # True if predetermined averages should be used or if a new average should be calculated at runtime
-    use_predetermined: bool = config['averages']['use_predetermined']
+    use_predetermined: bool = settings.averages.use_predetermined
 
     # Calculate average to use in EPA calculations
     if not use_predetermined:
-        avg_total, avg_auto, avg_tele = calculate_start_avg()
+        avg_total, avg_auto, avg_tele = calculate_start_avg(settings)
     else:
-        avg_total = config['averages']['total']
-        avg_auto = config['averages']['auto']
-        avg_tele = config['averages']['tele']
+        avg_total = settings.averages.total
+        avg_auto = settings.averages.auto
+        avg_tele = settings.averages.tele
 
     return avg_total, avg_auto, avg_tele
 
@@ -1,37 +1,117 @@
 from datetime import datetime
-
-import requests
+from functools import partial
+from typing import Callable
 
 from stats.averages import get_start_avg
-from stats.calculations.epa import update_epa
-from stats.calculations.opr import update_opr
-from stats.data import get_config, get_auth, get_season_score_parser
+from stats.calculations.epa import EpaEngine, update_epa
+from stats.calculations.matrix import GameMatrix, build_game_matrix
+from stats.calculations.opr import IncrementalOprStore, update_opr, update_opr_incremental
+from stats.data.settings import Settings, get_settings
+from stats.calculations.pipeline import EventResources, MatchStore, fetch_event_resources, is_final, prefetch_events
 from stats.data.api import get_team_from_ftc
 from stats.data.scores import EventData
-from stats.events import get_all_events
+from stats.events import get_all_events, get_event_matches, load_team_lists
 from stats.events.Event import Event
 from stats.teams import get_team_data_from_events
+from stats.teams.directory import get_team_directory
 from stats.teams.Team import Team
-from app.models import PendingEventModel
-from stats.events import event_has_teams, get_event_by_code
+from stats.events import get_event_by_code
+
+
+def calculate_all_stats(settings: Settings = None, match_store: MatchStore = None,
+                        opr_store: IncrementalOprStore = None):
+    if settings is None:
+        settings = get_settings()
 
+    events = get_all_events(settings=settings)
+    return calculate_epa_opr(events, settings, match_store, opr_store)
 
-def calculate_all_stats():
-    events = get_all_events()
-    return calculate_epa_opr(events)
 
+def calculate_epa_opr(events: list[Event], settings: Settings = None, match_store: MatchStore = None,
+                      opr_store: IncrementalOprStore = None):
+    if settings is None:
+        settings = get_settings()
 
-def calculate_epa_opr(events: list[Event]):
     team_data: dict[int, Team] = {}
 
     # Get starting avg for EPA calculations
-    avg_total, avg_auto, avg_tele = get_start_avg()
+    avg_total, avg_auto, avg_tele = get_start_avg(settings)
 
-    for event in events:
-        update_teams_at_event(event, team_data, avg_total, avg_auto, avg_tele)
+    update_teams_at_events(events, team_data, avg_total, avg_auto, avg_tele, settings, match_store,
+                           opr_store=opr_store)
 
     return team_data
 
+
+def update_teams_at_events(events: list[Event], team_data: dict[int, Team], avg_total: float, avg_auto: float,
+                           avg_tele: float, settings: Settings = None, match_store: MatchStore = None,
+                           team_factory: Callable[[int, int], Team] = None, opr_store: IncrementalOprStore = None,
+                           refresh: bool = False):
+    """
+    Update data for all teams using matches from the given events. Rosters, matches and scores for upcoming
+    events are downloaded in parallel while EPA/OPR are applied one event at a time in the given order.
+    Events found in the match store are read from it, with their saved rosters, finished events that aren't
+    are saved to it.
+    :param events: Events to process, in chronological order
+    :param team_data: Team data dictionary with existing statistics/matches. (Key = team_number, Value = team_object)
+    :param avg_total: Starting season total average for EPA calculations
+    :param avg_auto: Starting season auto average for EPA calculations
+    :param avg_tele: Starting season TeleOp average for EPA calculations
+    :param settings: OPTIONAL, settings to use instead of the configured ones
+    :param match_store: OPTIONAL, local copy of matches and scores read instead of the FIRST API
+    :param team_factory: OPTIONAL, creates teams seen for the first time from their number and season,
+                         defaults to the FIRST API through the season's team directory
+    :param opr_store: OPTIONAL, incremental OPR states (match mode), the caller saves the updated states
+    :param refresh: OPTIONAL, download every event again instead of reading the match store, and save the
+                    finished ones over their stored copy (picks up scores corrected after an event was stored)
+    :return: None
+    """
+    if settings is None:
+        settings = get_settings()
+    pipeline_config = settings.section('pipeline')
+    if team_factory is None:
+        team_factory = ftc_team_factory(settings)
+
+    stored = {}
+    rosters = {}
+    if match_store is not None and not refresh:
+        stored = match_store.load_season(settings.season, [event.event_code for event in events])
+        rosters = match_store.load_team_lists(settings.season, list(stored))
+    stored_codes = set(stored)
+    settle_days = pipeline_config.get('settle_days', 0)
+
+    def fetch(event: Event) -> EventResources:
+        if event.event_code in stored:
+            matches, event_data = stored.pop(event.event_code)
+            # The saved roster avoids downloading it, events stored before rosters were saved still do
+            if event.event_code in rosters:
+                event.team_list = rosters[event.event_code]
+            return EventResources(event, event.team_list, matches, event_data)
+        return fetch_event_resources(event, settings.season)
+
+    prefetched = prefetch_events(
+        events,
+        fetch,
+        depth=pipeline_config.get('prefetch_events', 8),
+        workers=pipeline_config.get('workers', 4)
+    )
+    # One EPA engine for every event, Team objects only receive the results once all events are processed
+    epa_engine = EpaEngine() if settings.section('epa').get('engine', 'objects') == 'vectorized' else None
+    if opr_store is None and settings.section('opr').get('mode', 'event') == 'match':
+        opr_store = IncrementalOprStore()
+
+    for resources in prefetched:
+        if match_store is not None and resources.event.event_code not in stored_codes and \
+                is_final(resources, settle_days=settle_days):
+            match_store.save_event(resources, settings.season)
+            stored_codes.add(resources.event.event_code)
+
+        update_teams_at_event(resources.event, team_data, avg_total, avg_auto, avg_tele, resources, settings,
+                              epa_engine, team_factory, opr_store)
+
+    if epa_engine is not None:
+        epa_engine.write_back(team_data)
+
 '''
 def update_teams_to_date(last_updated: datetime):
     """
@@ -87,32 +167,36 @@ def update_teams_to_date(last_updated: datetime):
     # 6. Return everything (this is the key change)
     return valid_events, team_data, still_pending
 '''
-def update_teams_to_date(last_updated, pending_event_codes: list[str]):
+def update_teams_to_date(last_updated, pending_event_codes: list[str], settings: Settings = None,
+                         match_store: MatchStore = None, opr_store: IncrementalOprStore = None):
+    if settings is None:
+        settings = get_settings()
 
     # fetch only new events
     new_events = get_all_events(
         min_date=last_updated.date(),
-        max_date=datetime.today().date()
+        max_date=datetime.today().date(),
+        settings=settings
     )
 
     # prepend pending events
     pending_events = [get_event_by_code(code) for code in pending_event_codes]
-    all_events = pending_events + new_events
+    all_events = [event for event in pending_events + new_events if event]
+
+    # Download every roster at once rather than one request per event
+    load_team_lists(all_events)
 
     valid_events = []
     still_pending = []
 
     for event in all_events:
-        if not event:
-            continue
-
-        if event_has_teams(event.event_code):
+        if event.team_list:
             valid_events.append(event)
         else:
             still_pending.append(event.event_code)
 
     # 🔥 team calculation happens here
-    teams = calculate_teams_from_events(valid_events)
+    teams = calculate_teams_from_events(valid_events, settings, match_store, opr_store)
 
     return valid_events, teams, still_pending
 
@@ -121,7 +205,10 @@ def update_teams_to_date(last_updated, pending_event_codes: list[str]):
 
 
 
-def update_teams_at_event(event: Event, team_data: dict[int, Team], avg_total: float, avg_auto: float, avg_tele: float):
+def update_teams_at_event(event: Event, team_data: dict[int, Team], avg_total: float, avg_auto: float, avg_tele: float,
+                          resources: EventResources = None, settings: Settings = None, epa_engine: EpaEngine = None,
+                          team_factory: Callable[[int, int], Team] = None,
+                          opr_store: IncrementalOprStore = None):
     """
     Update data for all teams using matches from given event code
     :param event: Event object to process
@@ -129,19 +216,29 @@ def update_teams_at_event(event: Event, team_data: dict[int, Team], avg_total: f
     :param avg_total: Starting season total average for EPA calculations
     :param avg_auto: Starting season auto average for EPA calculations
     :param avg_tele: Starting season TeleOp average for EPA calculations
+    :param resources: OPTIONAL, already downloaded roster, matches and scores for the event
+    :param settings: OPTIONAL, settings to use instead of the configured ones
+    :param epa_engine: OPTIONAL, EPA engine shared between events. The caller must call write_back once done
+    :param team_factory: OPTIONAL, creates teams seen for the first time from their number and season
+    :param opr_store: OPTIONAL, incremental OPR states shared between the events of a run
     :return: None
     """
-    season = get_config()['season']
-    event_code = event.event_code
-    team_number_list = event.team_list
+    if settings is None:
+        settings = get_settings()
+    if team_factory is None:
+        team_factory = ftc_team_factory(settings)
+    if resources is None:
+        resources = fetch_event_resources(event, settings.season)
 
-    game_matrix = create_game_matrix(event_code, team_number_list)
-    event_data: EventData = get_season_score_parser(season).parse(event_code)
+    team_number_list = resources.team_list
+
+    game_matrix = build_game_matrix(resources.matches, team_number_list)
+    event_data: EventData = resources.event_data
 
     for team_number in team_number_list:
         # Process teams that don't exist yet
         if team_number not in team_data.keys():
-            team = get_team_from_ftc(team_number)
+            team = team_factory(team_number, settings.season)
 
             # Add starting averages to team data
             team.update_game_played("START")
@@ -153,55 +250,56 @@ def update_teams_at_event(event: Event, team_data: dict[int, Team], avg_total: f
     # Skip if the event has no games
     if len(game_matrix) <= 0: return None
 
-    update_opr(team_number_list, game_matrix, event_data, team_data)
-    update_epa(team_number_list, game_matrix, event_data, team_data)
+    opr_config = settings.section('opr')
+    if opr_config.get('mode', 'event') == 'match':
+        update_opr_incremental(event.event_code, team_number_list, game_matrix, event_data, team_data,
+                               opr_config.get('prior', 1e-3), opr_store, settings.season)
+    else:
+        update_opr(team_number_list, game_matrix, event_data, team_data,
+                   opr_config.get('solver', 'lstsq'), opr_config.get('ridge', 0.0), event.event_code)
+    if epa_engine is not None:
+        epa_engine.process_event(team_number_list, game_matrix, event_data, team_data)
+    elif settings.section('epa').get('engine', 'objects') == 'vectorized':
+        event_engine = EpaEngine(capacity=len(team_number_list))
+        event_engine.process_event(team_number_list, game_matrix, event_data, team_data)
+        event_engine.write_back(team_data)
+    else:
+        update_epa(team_number_list, game_matrix, event_data, team_data)
 
     return None
 
 
-def create_game_matrix(event_code: str, team_list: list[int]):
+def ftc_team_factory(settings: Settings) -> Callable[[int, int], Team]:
+    """
+    :param settings: Settings of the run
+    :return: Team factory creating teams from the season's team directory, resolved once instead of per team
+    """
+    return partial(get_team_from_ftc, directory=get_team_directory(settings.season))
+
+
+def create_game_matrix(event_code: str, team_list: list[int]) -> GameMatrix:
     """
     Calculates the game matrix, indicating which teams played in which matches
     :param event_code: Valid FIRST Event Code
     :param team_list: Valid list of teams from the event
     :return: The game matrix
     """
-    season = get_config()['season']
-
-    response = requests.get(
-        f"http://ftc-api.firstinspires.org/v2.0/{season}/matches/" + event_code + "?tournamentLevel=qual", auth=get_auth())
-    matches = response.json()['matches']  # only grab from qualifiers to equally compare all teams
-
-    game_matrix = []
-
-    # Add 1 to row at index where team number is in list
-    for match in matches:
-        red_alliances = [0] * len(team_list)
-        blue_allainces = [0] * len(team_list)
+    return build_game_matrix(get_event_matches(event_code), team_list)
 
-        # for each match find if each team is on a red or blue alliance team
-        for team in match['teams']:
-            alliance = team['station']
-            if alliance == 'Red1' or alliance == 'Red2':
-                red_alliances[team_list.index(team['teamNumber'])] = 1
-            else:
-                blue_allainces[team_list.index(team['teamNumber'])] = 1
 
-        game_matrix.append(red_alliances)
-        game_matrix.append(blue_allainces)
-
-    return game_matrix
-
-def calculate_teams_from_events(events: list):
+def calculate_teams_from_events(events: list, settings: Settings = None, match_store: MatchStore = None,
+                                opr_store: IncrementalOprStore = None):
     if not events:
         return {}
+    if settings is None:
+        settings = get_settings()
 
     event_codes = [e.event_code for e in events]
 
-    avg_total, avg_auto, avg_tele = get_start_avg()
+    avg_total, avg_auto, avg_tele = get_start_avg(settings)
     team_data = get_team_data_from_events(event_codes)
 
-    for event in events:
-        update_teams_at_event(event, team_data, avg_total, avg_auto, avg_tele)
+    update_teams_at_events(events, team_data, avg_total, avg_auto, avg_tele, settings, match_store,
+                           opr_store=opr_store)
 
     return team_data
@@ -0,0 +1,257 @@
+"""
+Benchmarks for the calculation engine, run with python -m stats.calculations.benchmarks
+Events are generated randomly so no API access or database is needed.
+"""
+import random
+import resource
+import time
+import tracemalloc
+
+import numpy as np
+
+from stats.calculations.epa import EpaEngine, update_epa
+from stats.calculations.matrix import GameMatrix, build_game_matrix
+from stats.calculations.opr import OPR_SOLVERS, IncrementalOpr, get_score_matrix, solve_opr, update_opr
+from stats.data.scores import AllianceScoreData, EventData, MatchData
+from stats.teams.Team import Team
+
+
+def create_synthetic_event(num_teams: int, num_matches: int, seed: int = 0, event_code: str = "BENCH",
+                           team_pool: list[int] = None):
+    """
+    Generate a random qualification schedule and scores shaped like FIRST API data
+    :param num_teams: Number of teams at the event
+    :param num_matches: Number of qualification matches
+    :param seed: Seed for the random generator
+    :param event_code: Event code used in the generated match names
+    :param team_pool: OPTIONAL, team numbers to draw the event's teams from
+    :return: Tuple of the team list, the matches (FIRST API shape) and the EventData
+    """
+    rng = random.Random(seed)
+    team_list = rng.sample(team_pool or range(100, 40000), num_teams)
+    strength = {team_number: rng.uniform(5, 60) for team_number in team_list}
+
+    matches = []
+    event_data = EventData()
+    queue = []
+    for match_number in range(1, num_matches + 1):
+        # Schedule in rounds like a real qualification schedule, every team plays once before anyone plays again
+        if len(queue) < 4:
+            next_round = [team_number for team_number in team_list if team_number not in queue]
+            rng.shuffle(next_round)
+            queue += next_round
+        red1, red2, blue1, blue2 = queue[:4]
+        del queue[:4]
+        matches.append({
+            'matchNumber': match_number,
+            'teams': [
+                {'teamNumber': red1, 'station': 'Red1'},
+                {'teamNumber': red2, 'station': 'Red2'},
+                {'teamNumber': blue1, 'station': 'Blue1'},
+                {'teamNumber': blue2, 'station': 'Blue2'}
+            ]
+        })
+
+        def alliance_scores(first, second):
+            auto = rng.gauss((strength[first] + strength[second]) * 0.15, 3)
+            tele = rng.gauss((strength[first] + strength[second]) * 0.7, 8)
+            end = rng.gauss((strength[first] + strength[second]) * 0.15, 3)
+            return AllianceScoreData(auto + tele + end, auto, tele, end)
+
+        event_data.add(MatchData(2025, event_code, match_number, 'Q', alliance_scores(red1, red2),
+                                 alliance_scores(blue1, blue2)))
+
+    return team_list, matches, event_data
+
+
+def time_call(fn, repeat: int) -> float:
+    """
+    :return: Average milliseconds per call of fn over repeat calls
+    """
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def benchmark_opr_solvers(num_teams: int = 40, num_matches: int = 80, repeat: int = 200, ridge: float = 0.1):
+    """
+    Compare the original four separate lstsq solves against the batched solvers
+    :return: Dictionary of solver name -> (milliseconds per event, max difference from lstsq)
+    """
+    team_list, matches, event_data = create_synthetic_event(num_teams, num_matches)
+    game_matrix: GameMatrix = build_game_matrix(matches, team_list)
+    design_matrix = game_matrix.dense()
+    scores = get_score_matrix(event_data)
+
+    def separate_lstsq():
+        return np.column_stack([np.linalg.lstsq(design_matrix, scores[:, i])[0] for i in range(scores.shape[1])])
+
+    reference = separate_lstsq()
+    candidates = {'lstsq x4 (previous)': separate_lstsq}
+    for solver in OPR_SOLVERS:
+        candidates[f'{solver} batched'] = lambda solver=solver: solve_opr(design_matrix, scores, solver)
+    candidates[f'cholesky batched, ridge={ridge}'] = lambda: solve_opr(design_matrix, scores, 'cholesky', ridge)
+
+    results = {}
+    for name, fn in candidates.items():
+        results[name] = (time_call(fn, repeat), float(np.max(np.abs(fn() - reference))))
+    return results
+
+
+def benchmark_incremental_opr(num_teams: int = 40, num_matches: int = 80, repeat: int = 20, prior: float = 1e-3):
+    """
+    Compare keeping OPR current after every match by re-solving the event against recursive least squares
+    :return: Tuple of milliseconds per match for re-solving, for the incremental update, and the max difference
+             between the incremental result and the equivalent ridge solve
+    """
+    team_list, matches, event_data = create_synthetic_event(num_teams, num_matches)
+    game_matrix = build_game_matrix(matches, team_list)
+    design_matrix = game_matrix.dense()
+    scores = get_score_matrix(event_data)
+
+    def resolve_every_match():
+        for rows in range(2, len(design_matrix) + 1, 2):
+            solve_opr(design_matrix[:rows], scores[:rows])
+
+    def incremental():
+        state = IncrementalOpr(team_list, prior)
+        for game in range(num_matches):
+            state.add_match(game_matrix.pairs[2 * game], game_matrix.pairs[2 * game + 1],
+                            scores[2 * game], scores[2 * game + 1])
+        return state
+
+    resolve_ms = time_call(resolve_every_match, repeat) / num_matches
+    incremental_ms = time_call(incremental, repeat) / num_matches
+    difference = float(np.max(np.abs(incremental().opr - solve_opr(design_matrix, scores, 'cholesky', prior))))
+    return resolve_ms, incremental_ms, difference
+
+
+def create_synthetic_season(num_events: int, num_teams: int, teams_per_event: int = 32, matches_per_event: int = 64):
+    """
+    Generate a season of events drawing from a shared pool of teams, so teams play at several events
+    :return: List of (team_list, GameMatrix, EventData) tuples in the order they should be processed
+    """
+    team_pool = list(range(1000, 1000 + num_teams))
+    season = []
+    for event_index in range(num_events):
+        team_list, matches, event_data = create_synthetic_event(
+            teams_per_event, matches_per_event, seed=event_index, event_code=f"EV{event_index}", team_pool=team_pool
+        )
+        season.append((team_list, build_game_matrix(matches, team_list), event_data))
+    return season
+
+
+def create_starting_teams(season, avg_total: float = 27.9, avg_auto: float = 4.0, avg_tele: float = 19.5):
+    """
+    Create a Team for every team in a synthetic season, seeded the same way update_teams_at_event seeds new teams
+    """
+    team_data = {}
+    for team_list, _, _ in season:
+        for team_number in team_list:
+            if team_number not in team_data:
+                team = Team(team_number, f"Team {team_number}", "USA", "CA", "City", "USCA")
+                team.update_game_played("START")
+                team.update_epa(avg_total, avg_auto, avg_tele)
+                team_data[team_number] = team
+    return team_data
+
+
+def check_epa_parity(num_events: int = 60, num_teams: int = 400) -> float:
+    """
+    Run a synthetic season through update_epa and through EpaEngine and compare every EPA field of every team
+    :return: Largest absolute difference found in any EPA value
+    """
+    season = create_synthetic_season(num_events, num_teams)
+
+    object_teams = create_starting_teams(season)
+    for team_list, game_matrix, event_data in season:
+        update_epa(team_list, game_matrix, event_data, object_teams)
+
+    engine_teams = create_starting_teams(season)
+    engine = EpaEngine()
+    for team_list, game_matrix, event_data in season:
+        engine.process_event(team_list, game_matrix, event_data, engine_teams)
+    engine.write_back(engine_teams)
+
+    difference = 0.0
+    for team_number, expected in object_teams.items():
+        actual = engine_teams[team_number]
+        if list(actual.matches) != list(expected.matches) or actual.games_played != expected.games_played:
+            raise AssertionError(f"Team {team_number} played different matches with the EPA engine")
+
+        for field in ('historical_epa', 'historical_auto_epa', 'historical_tele_epa'):
+            expected_values = np.array(getattr(expected, field))
+            actual_values = np.array(getattr(actual, field))
+            if expected_values.shape != actual_values.shape:
+                raise AssertionError(f"Team {team_number} has a different number of {field} values")
+            difference = max(difference, float(np.max(np.abs(expected_values - actual_values))))
+
+        for field in ('epa_total', 'epa_auto_total', 'epa_tele_total'):
+            difference = max(difference, abs(getattr(expected, field) - getattr(actual, field)))
+
+    return difference
+
+
+def benchmark_epa(num_events: int = 200, num_teams: int = 1500, repeat: int = 3):
+    """
+    Compare update_epa on Team objects against the EpaEngine for a synthetic season
+    :return: Tuple of milliseconds per season for update_epa and for the engine
+    """
+    season = create_synthetic_season(num_events, num_teams)
+
+    def objects():
+        team_data = create_starting_teams(season)
+        for team_list, game_matrix, event_data in season:
+            update_epa(team_list, game_matrix, event_data, team_data)
+
+    def engine():
+        team_data = create_starting_teams(season)
+        epa_engine = EpaEngine()
+        for team_list, game_matrix, event_data in season:
+            epa_engine.process_event(team_list, game_matrix, event_data, team_data)
+        epa_engine.write_back(team_data)
+
+    return time_call(objects, repeat), time_call(engine, repeat)
+
+
+def benchmark_team_memory(num_events: int = 700, num_teams: int = 7000, teams_per_event: int = 28,
+                          matches_per_event: int = 42):
+    """
+    Rebuild a synthetic full season (EPA and OPR for every event) and measure the memory held by the Team objects
+    :return: Tuple of MB held by the teams once the season is processed, and the peak RSS of the process in MB
+    """
+    season = create_synthetic_season(num_events, num_teams, teams_per_event, matches_per_event)
+    # Build the cached design matrices up front so only memory held by the teams is traced
+    for _, game_matrix, _ in season:
+        game_matrix.dense()
+
+    tracemalloc.start()
+    team_data = create_starting_teams(season)
+    for team_list, game_matrix, event_data in season:
+        update_opr(team_list, game_matrix, event_data, team_data)
+        update_epa(team_list, game_matrix, event_data, team_data)
+    team_mb = tracemalloc.get_traced_memory()[0] / 2 ** 20
+    tracemalloc.stop()
+
+    # ru_maxrss is reported in KB on Linux
+    return team_mb, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+if __name__ == '__main__':
+    # First, so the peak RSS is not raised by the other benchmarks
+    team_mb, peak_rss_mb = benchmark_team_memory()
+    print(f"Full season, 7000 teams: Team objects {team_mb:.1f} MB, peak RSS {peak_rss_mb:.1f} MB")
+
+    print(f"EPA engine parity: max difference {check_epa_parity():.2e}")
+    objects_ms, engine_ms = benchmark_epa()
+    print(f"EPA, 200 events: update_epa {objects_ms:.1f} ms, EpaEngine {engine_ms:.1f} ms")
+
+    for teams, games in [(24, 48), (40, 80), (64, 140)]:
+        print(f"OPR solvers, {teams} teams / {games} matches:")
+        for name, (ms, diff) in benchmark_opr_solvers(teams, games).items():
+            print(f"  {name:<32} {ms:8.3f} ms/event   max diff vs lstsq {diff:.2e}")
+
+        resolve_ms, incremental_ms, diff = benchmark_incremental_opr(teams, games)
+        print(f"  per-match OPR: re-solve {resolve_ms:.3f} ms/match, incremental {incremental_ms:.3f} ms/match, "
+              f"max diff vs ridge solve {diff:.2e}")
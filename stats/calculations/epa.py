@@ -1,5 +1,6 @@
 import numpy as np
 
+from stats.calculations.matrix import GameMatrix
 from stats.data.scores import EventData, MatchData
 from stats.teams.Team import Team
 
@@ -48,7 +49,7 @@ def calculate_epa(red_epa: int,
 
     return delta_epa_red, delta_epa_blue
 
-def update_epa(team_list: list[int], game_matrix: list[list[int]], event_data: EventData, team_data: dict[int, Team]):
+def update_epa(team_list: list[int], game_matrix: GameMatrix, event_data: EventData, team_data: dict[int, Team]):
     """
     Update EPA for all teams at an event for each match played at that event
     :param team_list: List of team numbers for teams at event
@@ -57,13 +58,15 @@ def update_epa(team_list: list[int], game_matrix: list[list[int]], event_data: E
     :param team_data: Dictionary of teams where ALL teams must be present in the dictionary
     :return:
     """
+    pairs = game_matrix.pairs.tolist()
+
     game_index = 0
-    for i in range(0, len(game_matrix), 2):
-        red_index = np.where(np.array(game_matrix[i]) == 1)[0]
+    for i in range(0, len(pairs), 2):
+        red_index = pairs[i]
         team1 = team_data[team_list[red_index[0]]]
         team2 = team_data[team_list[red_index[1]]]
 
-        blue_index = np.where(np.array(game_matrix[i + 1]) == 1)[0]
+        blue_index = pairs[i + 1]
         team3 = team_data[team_list[blue_index[0]]]
         team4 = team_data[team_list[blue_index[1]]]
 
@@ -115,4 +118,198 @@ def update_epa(team_list: list[int], game_matrix: list[list[int]], event_data: E
             team = teams[j]
             team.update_epa(change_blue, change_blue_auto, change_blue_tele)
 
-        game_index += 1
\ No newline at end of file
+        game_index += 1
+
+
+class EpaEngine:
+    """
+    Structure-of-arrays EPA calculator.
+
+    Total, auto and teleop EPA and games played for every team are kept in contiguous NumPy arrays indexed
+    by a team slot. process_event only queues an event's matches; write_back then applies every queued match
+    with vectorized arithmetic and copies the results onto the Team objects once.
+
+    A match only reads and changes the EPA of its own four teams, so matches without a team in common can be
+    applied together. Each queued match goes in the wave after the last wave any of its teams played in. This
+    keeps every team's matches in the order update_epa would process them, so the results are identical, while
+    events that share no teams are calculated in the same waves.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        """
+        :param capacity: Number of team slots allocated up front, grown automatically when needed
+        """
+        self.slots: dict[int, int] = {}
+        self.team_numbers: list[int] = []
+        self.epa = np.zeros((capacity, 3))  # total, auto, tele
+        self.games_played = np.zeros(capacity, dtype=np.int64)
+        self.played: list[set[str]] = []
+
+        # Matches queued since the last write back, one array per event
+        self._queued_slots: list[np.ndarray] = []
+        self._queued_scores: list[np.ndarray] = []
+        self._queued_names: list[np.ndarray] = []
+        self._queued_waves: list[int] = []
+        self._slot_wave: list[int] = []
+
+        self._parameter_table = np.empty((0, 2))
+
+    def slot(self, team: Team) -> int:
+        """
+        Get the slot of a team, loading its current EPA and matches from the Team object the first time
+        :param team: Team object
+        :return: Slot index of the team
+        """
+        slot = self.slots.get(team.team_number)
+        if slot is not None:
+            return slot
+
+        slot = len(self.team_numbers)
+        if slot >= len(self.games_played):
+            self.epa = np.vstack((self.epa, np.zeros_like(self.epa)))
+            self.games_played = np.concatenate((self.games_played, np.zeros_like(self.games_played)))
+
+        self.slots[team.team_number] = slot
+        self.team_numbers.append(team.team_number)
+        self.epa[slot] = (team.epa_total, team.epa_auto_total, team.epa_tele_total)
+        self.games_played[slot] = team.games_played
+        self.played.append(set(team.matches))
+        self._slot_wave.append(-1)
+        return slot
+
+    def process_event(self, team_list: list[int], game_matrix: GameMatrix, event_data: EventData,
+                      team_data: dict[int, Team]):
+        """
+        Queue each match played at an event, skipping matches already counted for a team like update_epa does.
+        Results are calculated and copied onto the Team objects by write_back
+        :param team_list: List of team numbers for teams at event
+        :param game_matrix: Matrix of games played at the event
+        :param event_data: Scoring data from the event
+        :param team_data: Dictionary of teams where ALL teams must be present in the dictionary
+        :return: None
+        """
+        column_slots = np.array([self.slot(team_data[team_number]) for team_number in team_list], dtype=np.int64)
+        # One row per match holding the slots of red1, red2, blue1 and blue2
+        match_slots = column_slots[game_matrix.pairs].reshape(-1, 4)
+        matches: list[MatchData] = event_data.matches[:len(match_slots)]
+        match_names = [match_data.get_match_name() for match_data in matches]
+
+        played = self.played
+        slot_wave = self._slot_wave
+        queued = []
+        for game_index, (red1, red2, blue1, blue2) in enumerate(match_slots.tolist()):
+            match_name = match_names[game_index]
+            if match_name in played[red1]:
+                continue
+
+            played[red1].add(match_name)
+            played[red2].add(match_name)
+            played[blue1].add(match_name)
+            played[blue2].add(match_name)
+
+            wave = max(slot_wave[red1], slot_wave[red2], slot_wave[blue1], slot_wave[blue2]) + 1
+            slot_wave[red1] = slot_wave[red2] = slot_wave[blue1] = slot_wave[blue2] = wave
+            self._queued_waves.append(wave)
+            queued.append(game_index)
+
+        if not queued:
+            return
+
+        self._queued_slots.append(match_slots[queued])
+        self._queued_names.append(np.array(match_names, dtype=object)[queued])
+        self._queued_scores.append(np.array([
+            ((match_data.red_alliance.total_score, match_data.red_alliance.auto_score,
+              match_data.red_alliance.tele_score),
+             (match_data.blue_alliance.total_score, match_data.blue_alliance.auto_score,
+              match_data.blue_alliance.tele_score))
+            for match_data in matches
+        ], dtype=np.float64)[queued])
+
+    def write_back(self, team_data: dict[int, Team]):
+        """
+        Calculate EPA for every queued match and copy current EPA, games played and history onto the Team objects
+        :param team_data: Dictionary of teams containing every team processed by the engine
+        :return: None
+        """
+        if self._queued_slots:
+            match_slots = np.concatenate(self._queued_slots)
+            history = self._run_waves(match_slots, np.concatenate(self._queued_scores),
+                                      np.array(self._queued_waves, dtype=np.int64))
+            self._copy_history(team_data, match_slots.ravel(), np.repeat(np.concatenate(self._queued_names), 4),
+                               history.reshape(-1, 3))
+
+            self._queued_slots = []
+            self._queued_scores = []
+            self._queued_names = []
+            self._queued_waves = []
+            self._slot_wave = [-1] * len(self.team_numbers)
+
+        for slot, team_number in enumerate(self.team_numbers):
+            team = team_data[team_number]
+            team.epa_total, team.epa_auto_total, team.epa_tele_total = self.epa[slot].tolist()
+            team.games_played = int(self.games_played[slot])
+
+    def _run_waves(self, match_slots: np.ndarray, scores: np.ndarray, waves: np.ndarray) -> np.ndarray:
+        """
+        :param match_slots: Slots of red1, red2, blue1 and blue2 for each queued match
+        :param scores: Scores of each queued match shaped (match, alliance, component)
+        :param waves: Wave of each queued match
+        :return: EPA of the four teams after each match, shaped (match, team, component)
+        """
+        epa = self.epa
+        games_played = self.games_played
+        history = np.empty((len(match_slots), 4, 3))
+
+        order = np.argsort(waves, kind='stable')
+        boundaries = np.flatnonzero(np.diff(waves[order])) + 1
+        for wave in np.split(order, boundaries):
+            slots = match_slots[wave]
+            wave_games_played = games_played[slots] + 1
+            games_played[slots] = wave_games_played
+
+            m, k = self._parameters(wave_games_played.sum(axis=1))
+            scale = k / (1 + m)
+
+            # (match, alliance, team, component) view of the four teams of every match in the wave
+            team_epa = epa[slots].reshape(-1, 2, 2, 3)
+            error = scores[wave] - team_epa.sum(axis=2)
+            team_epa += (scale * (error - m * error[:, ::-1]))[:, :, np.newaxis]
+
+            team_epa = team_epa.reshape(-1, 4, 3)
+            epa[slots] = team_epa
+            history[wave] = team_epa
+
+        return history
+
+    def _parameters(self, games_played_sums: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Look up the m and k EPA parameters of each match in a wave
+        :param games_played_sums: Total games played by the four teams of each match
+        :return: m and k shaped (matches, 1, 1) to broadcast over alliances and components
+        """
+        highest = int(games_played_sums.max())
+        if highest >= len(self._parameter_table):
+            # Parameters only depend on the average of four integers, so they are computed once per sum
+            self._parameter_table = np.array([get_epa_parameters(total / 4) for total in range(2 * highest + 1)],
+                                             dtype=np.float64)
+        parameters = self._parameter_table[games_played_sums]
+        return parameters[:, 0, np.newaxis, np.newaxis], parameters[:, 1, np.newaxis, np.newaxis]
+
+    def _copy_history(self, team_data: dict[int, Team], slots: np.ndarray, match_names: np.ndarray,
+                      history: np.ndarray):
+        """
+        Append each team's matches and EPA history in the order they were played
+        :param slots: Slot of every history entry
+        :param match_names: Match name of every history entry
+        :param history: EPA of every history entry shaped (entry, component)
+        """
+        order = np.argsort(slots, kind='stable')
+        boundaries = np.flatnonzero(np.diff(slots[order])) + 1
+
+        for group in np.split(order, boundaries):
+            team = team_data[self.team_numbers[slots[group[0]]]]
+            values = history[group]
+            team.matches.extend(match_names[group].tolist())
+            team.historical_epa.frombytes(values[:, 0].tobytes())
+            team.historical_auto_epa.frombytes(values[:, 1].tobytes())
+            team.historical_tele_epa.frombytes(values[:, 2].tobytes())
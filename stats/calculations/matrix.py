@@ -0,0 +1,74 @@
+import numpy as np
+
+
+class GameMatrix:
+    """
+    Which teams played in which matches at an event.
+
+    Every match is stored as two rows, red alliance first, and every row holds the column indices of the
+    two teams on that alliance. Columns follow the order of the event's team list.
+    """
+
+    def __init__(self, team_list: list[int], pairs: np.ndarray):
+        """
+        :param team_list: Team numbers of the event, in column order
+        :param pairs: Array of shape (rows, 2) with the column index of both teams of each alliance row
+        """
+        self.team_list = team_list
+        self.columns = {team_number: column for column, team_number in enumerate(team_list)}
+        self.pairs = pairs
+        self._dense = None
+
+    def __len__(self):
+        return len(self.pairs)
+
+    def dense(self) -> np.ndarray:
+        """
+        :return: The (rows x teams) design matrix used for OPR, 1 where a team played on an alliance row
+        """
+        if self._dense is None:
+            dense = np.zeros((len(self.pairs), len(self.team_list)), dtype=np.float64)
+            rows = np.arange(len(self.pairs))
+            dense[rows, self.pairs[:, 0]] = 1
+            dense[rows, self.pairs[:, 1]] = 1
+            self._dense = dense
+        return self._dense
+
+
+def build_game_matrix(matches: list[dict], team_list: list[int]) -> GameMatrix:
+    """
+    Build the game matrix from an event's matches, indicating which teams played in which matches
+    :param matches: Qualification matches as returned by the FIRST API matches endpoint
+    :param team_list: Valid list of teams from the event
+    :return: The game matrix
+    """
+    columns = {team_number: column for column, team_number in enumerate(team_list)}
+    pairs = np.empty((len(matches) * 2, 2), dtype=np.int32)
+
+    for i, match in enumerate(matches):
+        red_alliance = []
+        blue_alliance = []
+
+        # for each match find if each team is on a red or blue alliance team
+        for team in match['teams']:
+            column = columns.get(team['teamNumber'])
+            if column is None:
+                raise ValueError(f"Team {team['teamNumber']} played match {match.get('matchNumber')} "
+                                 f"but is not on the event's team list.")
+
+            alliance = team['station']
+            if alliance == 'Red1' or alliance == 'Red2':
+                red_alliance.append(column)
+            else:
+                blue_alliance.append(column)
+
+        if len(red_alliance) != 2 or len(blue_alliance) != 2:
+            raise ValueError(f"Match {match.get('matchNumber')} does not have two teams on each alliance.")
+
+        pairs[2 * i] = red_alliance
+        pairs[2 * i + 1] = blue_alliance
+
+    # Keep the teams of each alliance in column order
+    pairs.sort(axis=1)
+
+    return GameMatrix(team_list, pairs)
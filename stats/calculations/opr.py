@@ -1,37 +1,267 @@
+from typing import Callable, Iterator
+
 import numpy as np
 
+from stats.calculations.matrix import GameMatrix
 from stats.data.scores import EventData
 from stats.teams.Team import Team
 
+# Ways of solving the OPR least squares problem
+#   lstsq = SVD based least squares, exact minimum-norm solution even when some teams can't be separated
+#   cholesky = normal equations (A^T A + ridge * I) x = A^T b, faster, falls back to lstsq if A^T A is singular
+OPR_SOLVERS = ('lstsq', 'cholesky')
+
+
+def get_score_matrix(event_data: EventData) -> np.ndarray:
+    """
+    Stack every score component into a single right-hand side
+    :param event_data: EventData object containing scores for each match
+    :return: Array of shape (rows, 4) with total, auto, tele and endgame scores for each alliance row
+    """
+    return np.column_stack((
+        event_data.total_match_scores,
+        event_data.auto_match_scores,
+        event_data.tele_match_scores,
+        event_data.end_match_scores
+    )).astype(np.float64)
+
+
+def solve_opr(design_matrix: np.ndarray, scores: np.ndarray, solver: str = 'lstsq', ridge: float = 0.0) -> np.ndarray:
+    """
+    Solve OPR for every score component at once, factoring the design matrix a single time
+    :param design_matrix: (rows x teams) matrix of which teams played on each alliance row
+    :param scores: (rows x components) matrix of alliance scores
+    :param solver: One of OPR_SOLVERS
+    :param ridge: OPTIONAL, ridge term added to the normal equations to stabilise small or poorly connected events.
+                  A positive ridge always solves the normal equations, whatever the solver
+    :return: (teams x components) matrix of OPR values
+    """
+    if solver not in OPR_SOLVERS:
+        raise ValueError(f"Unknown OPR solver {solver}, expected one of {OPR_SOLVERS}")
+
+    if solver == 'cholesky' or ridge > 0:
+        normal_matrix = design_matrix.T @ design_matrix
+        if ridge > 0:
+            normal_matrix[np.diag_indices_from(normal_matrix)] += ridge
+
+        try:
+            lower = np.linalg.cholesky(normal_matrix)
+        except np.linalg.LinAlgError:
+            # A^T A is singular (e.g. a team that never played), use the minimum-norm solution instead
+            return np.linalg.lstsq(design_matrix, scores)[0]
+
+        y = np.linalg.solve(lower, design_matrix.T @ scores)
+        return np.linalg.solve(lower.T, y)
+
+    return np.linalg.lstsq(design_matrix, scores)[0]
+
 
-def calculate_opr(game_matrix: list[list[int]], event_data: EventData):
+def calculate_opr(game_matrix: GameMatrix, event_data: EventData, solver: str = 'lstsq', ridge: float = 0.0):
     """
     Calculate OPR for an event given the game matrix and event data object
     :param game_matrix: Matrix of games played at the event
     :param event_data: EventData object containing scores for each match
+    :param solver: OPTIONAL, one of OPR_SOLVERS
+    :param ridge: OPTIONAL, ridge term for the normal equations
     :return: Tuple containing total, auto, tele and endgame opr for all teams according to the game matrix
     """
-    total_opr = np.linalg.lstsq(game_matrix, event_data.total_match_scores)[0]
-    auto_opr = np.linalg.lstsq(game_matrix, event_data.auto_match_scores)[0]
-    tele_opr = np.linalg.lstsq(game_matrix, event_data.tele_match_scores)[0]
-    end_opr = np.linalg.lstsq(game_matrix, event_data.end_match_scores)[0]
+    opr = solve_opr(game_matrix.dense(), get_score_matrix(event_data), solver, ridge)
 
-    return total_opr, auto_opr, tele_opr, end_opr
+    return opr[:, 0], opr[:, 1], opr[:, 2], opr[:, 3]
 
 
-def update_opr(team_list: list[int], game_matrix: list[list[int]], event_data: EventData, team_data: dict[int, Team]):
+def update_opr(team_list: list[int], game_matrix: GameMatrix, event_data: EventData, team_data: dict[int, Team],
+               solver: str = 'lstsq', ridge: float = 0.0, event_code: str = None):
     """
     Update the OPR for all teams at an event given the event code and a dictionary with the team data
     :param team_list: List of team numbers for teams at the event
     :param game_matrix: Matrix of games played at the event
     :param event_data: EventData object containing scores for each match at the event
     :param team_data: Dictionary that MUST have the team number and team object as a key and value
+    :param solver: OPTIONAL, one of OPR_SOLVERS
+    :param ridge: OPTIONAL, ridge term for the normal equations
+    :param event_code: OPTIONAL, event code recorded with each team's history point
     :return: None
     """
 
-    total_opr, auto_opr, tele_opr, end_opr = calculate_opr(game_matrix, event_data)
+    total_opr, auto_opr, tele_opr, end_opr = calculate_opr(game_matrix, event_data, solver, ridge)
 
     for i in range(len(team_list)):
         team_number = team_list[i]  # Use team number from team list to get team
         team_obj = team_data[team_number]
-        team_obj.update_opr(total_opr[i], auto_opr[i], tele_opr[i], end_opr[i])
\ No newline at end of file
+        team_obj.update_opr(total_opr[i], auto_opr[i], tele_opr[i], end_opr[i], event_code=event_code)
+
+
+class IncrementalOpr:
+    """
+    Recursive least squares OPR for a single event.
+
+    Keeps the inverse of the regularised normal matrix P = (A^T A + prior * I)^-1 and the current OPR
+    estimate for every score component. Each match adds two rows (red and blue), applied as two
+    Sherman-Morrison updates, so a new match costs O(teams^2) instead of a full re-solve of the event.
+    The estimate equals the ridge solution with a ridge of prior, which is negligible once teams have played.
+    """
+
+    def __init__(self, team_list: list[int], prior: float = 1e-3, components: int = 4):
+        """
+        :param team_list: Team numbers of the event
+        :param prior: Ridge term the recursion starts from, must be positive
+        :param components: Number of score components solved together (total, auto, tele, end)
+        """
+        self.team_list = list(team_list)
+        self.columns = {team_number: column for column, team_number in enumerate(self.team_list)}
+        self.prior = prior
+
+        self.inverse = np.eye(len(self.team_list)) / prior
+        self.opr = np.zeros((len(self.team_list), components))
+        self.matches_seen = 0
+        self.applied: list[tuple] = []  # match_key of every match applied, in order
+
+    def add_team(self, team_number: int) -> int:
+        """
+        Add a column for a team that was not on the roster when the state was created
+        :return: Column of the team
+        """
+        column = self.columns.get(team_number)
+        if column is not None:
+            return column
+
+        size = len(self.team_list)
+        inverse = np.zeros((size + 1, size + 1))
+        inverse[:size, :size] = self.inverse
+        inverse[size, size] = 1 / self.prior
+
+        self.inverse = inverse
+        self.opr = np.vstack((self.opr, np.zeros((1, self.opr.shape[1]))))
+        self.team_list.append(team_number)
+        self.columns[team_number] = size
+        return size
+
+    def add_row(self, first: int, second: int, scores: np.ndarray):
+        """
+        Apply a single alliance row where the teams in columns first and second scored scores
+        :param first: Column of the first team on the alliance
+        :param second: Column of the second team on the alliance
+        :param scores: Score of the alliance for each component
+        :return: None
+        """
+        # P a for a row with ones in two columns is the sum of two columns of P
+        p_row = self.inverse[:, first] + self.inverse[:, second]
+        gain = p_row / (1 + p_row[first] + p_row[second])
+
+        residual = scores - (self.opr[first] + self.opr[second])
+        self.opr += np.outer(gain, residual)
+        self.inverse -= np.outer(gain, p_row)
+
+    def add_match(self, red: tuple[int, int], blue: tuple[int, int], red_scores: np.ndarray, blue_scores: np.ndarray,
+                  key: tuple = None):
+        """
+        Rank-two update for one match, red alliance row first
+        :param key: OPTIONAL, match_key of the match, used to notice when applied matches change
+        """
+        self.add_row(red[0], red[1], red_scores)
+        self.add_row(blue[0], blue[1], blue_scores)
+        self.matches_seen += 1
+        self.applied.append(key)
+
+
+def match_keys(game_matrix: GameMatrix, event_data: EventData, scores: np.ndarray) -> list[tuple]:
+    """
+    :param game_matrix: Matrix of games played at the event
+    :param event_data: EventData object containing scores for each match at the event
+    :param scores: Score matrix of the event from get_score_matrix
+    :return: Name, teams and scores of each match, equal only if the match is unchanged
+    """
+    team_list = game_matrix.team_list
+    pairs = game_matrix.pairs
+    return [(event_data.matches[game_index].get_match_name(),
+             tuple(team_list[column] for column in (*pairs[2 * game_index], *pairs[2 * game_index + 1])),
+             tuple(scores[2 * game_index]) + tuple(scores[2 * game_index + 1]))
+            for game_index in range(len(pairs) // 2)]
+
+
+class IncrementalOprStore:
+    """
+    Incremental OPR state of each event. With a loader, states saved by a previous run (e.g. in the database)
+    are picked up again, so the matches that arrived since then only cost their own update.
+    """
+
+    def __init__(self, load: Callable[[int, str], IncrementalOpr | None] = None):
+        """
+        :param load: OPTIONAL, returns the state saved for a season and event code, None if there is none.
+                     Leave out when teams start from scratch (full rebuild), every match must then be applied
+        """
+        self.load = load
+        self._states: dict[tuple[int, str], IncrementalOpr] = {}
+        self._updated: set[tuple[int, str]] = set()
+
+    def get(self, season: int, event_code: str, team_list: list[int], prior: float,
+            keys: list[tuple]) -> IncrementalOpr:
+        """
+        :param keys: match_keys of the event's current matches
+        :return: The state of the event, created again if there is none or its applied matches changed
+        """
+        key = (season, event_code)
+        state = self._states.get(key)
+        if state is None and self.load is not None:
+            state = self.load(season, event_code)
+        if state is None or state.prior != prior or state.applied != keys[:state.matches_seen]:
+            state = IncrementalOpr(team_list, prior)
+
+        self._states[key] = state
+        self._updated.add(key)
+        return state
+
+    def updated(self) -> Iterator[tuple[int, str, IncrementalOpr]]:
+        """
+        :return: Season, event code and state of every event updated through this store, to be saved
+        """
+        for season, event_code in self._updated:
+            yield season, event_code, self._states[(season, event_code)]
+
+
+def update_opr_incremental(event_code: str, team_list: list[int], game_matrix: GameMatrix, event_data: EventData,
+                           team_data: dict[int, Team], prior: float = 1e-3, store: IncrementalOprStore = None,
+                           season: int = None):
+    """
+    Update the OPR for all teams at an event one match at a time, adding a history point to the four teams
+    of each match. Matches already applied to the event's state are skipped, and history is only added for
+    matches the teams have not played yet, so the event can be updated again as new matches arrive.
+    :param event_code: Event code the state is kept under
+    :param team_list: List of team numbers for teams at the event
+    :param game_matrix: Matrix of games played at the event
+    :param event_data: EventData object containing scores for each match at the event
+    :param team_data: Dictionary that MUST have the team number and team object as a key and value
+    :param prior: OPTIONAL, ridge term the recursion starts from
+    :param store: OPTIONAL, states of the events saved by previous runs, a new empty store if not given
+    :param season: OPTIONAL, season the event belongs to, part of the key the state is kept under
+    :return: None
+    """
+    if store is None:
+        store = IncrementalOprStore()
+
+    scores = get_score_matrix(event_data)
+    pairs = game_matrix.pairs
+    keys = match_keys(game_matrix, event_data, scores)
+
+    state = store.get(season, event_code, team_list, prior, keys)
+    columns = [state.add_team(team_number) for team_number in game_matrix.team_list]
+
+    for game_index in range(state.matches_seen, len(pairs) // 2):
+        red = (columns[pairs[2 * game_index][0]], columns[pairs[2 * game_index][1]])
+        blue = (columns[pairs[2 * game_index + 1][0]], columns[pairs[2 * game_index + 1][1]])
+        state.add_match(red, blue, scores[2 * game_index], scores[2 * game_index + 1], keys[game_index])
+
+        match_teams = [team_data[state.team_list[column]] for column in red + blue]
+
+        # Same rule as EPA: a match the first team already played was recorded in a previous run
+        if event_data.matches[game_index].get_match_name() in match_teams[0].matches:
+            continue
+
+        for team_obj, column in zip(match_teams, red + blue):
+            team_obj.update_opr(*state.opr[column], event_code=event_code)
+
+    # Bring every team's current OPR up to date without adding extra history points
+    for team_number in team_list:
+        column = state.columns[team_number]
+        team_data[team_number].update_opr(*state.opr[column], record_history=False)
@@ -0,0 +1,132 @@
+from abc import abstractmethod
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from typing import Callable, Iterator
+
+from stats.data import get_season_score_parser
+from stats.data.scores import EventData
+from stats.events import get_event_matches
+from stats.events.Event import Event
+
+
+class EventResources:
+    """
+    Everything downloaded from the FIRST API that is needed to update teams for one event
+    """
+
+    def __init__(self, event: Event, team_list: list[int], matches: list[dict], event_data: EventData):
+        """
+        :param event: Event the resources belong to
+        :param team_list: Team numbers of the event's roster
+        :param matches: Qualification matches as returned by the FIRST API matches endpoint
+        :param event_data: Parsed qualification scores for the event
+        """
+        self.event = event
+        self.team_list = team_list
+        self.matches = matches
+        self.event_data = event_data
+
+
+class MatchStore:
+    """
+    Local copy of the raw qualification matches and scores of finished events, so recalculating a season
+    reads them with a bulk query instead of downloading them again
+    """
+
+    @abstractmethod
+    def load_season(self, season: int, event_codes: list[str] = None) -> dict[str, tuple[list[dict], EventData]]:
+        """
+        Load every stored event of a season
+        :param season: FTC API season year
+        :param event_codes: OPTIONAL, only load these events
+        :return: Dictionary of event code to the event's matches (shaped like the FIRST API matches endpoint)
+                 and parsed scores
+        """
+        pass
+
+    @abstractmethod
+    def load_team_lists(self, season: int, event_codes: list[str]) -> dict[str, list[int]]:
+        """
+        Load the rosters saved with stored events
+        :param season: FTC API season year
+        :param event_codes: Events to load the rosters of
+        :return: Dictionary of event code to team numbers, events without a saved roster are left out
+        """
+        pass
+
+    @abstractmethod
+    def save_event(self, resources: EventResources, season: int):
+        """
+        Store the roster, matches and scores of an event, replacing anything stored for it before
+        :param resources: Downloaded resources of the event
+        :param season: Season the event belongs to
+        """
+        pass
+
+
+def is_final(resources: EventResources, today: date = None, settle_days: int = 0) -> bool:
+    """
+    :param resources: Downloaded resources of an event
+    :param today: OPTIONAL, current date
+    :param settle_days: OPTIONAL, days after the end of an event during which scores may still be corrected
+    :return: True if the event is over and has matches and scores, so its resources won't change anymore
+    """
+    if today is None:
+        today = date.today()
+    ended = datetime.fromisoformat(resources.event.dateEnd).date() + timedelta(days=settle_days) < today
+    return ended and len(resources.matches) > 0 and len(resources.event_data.matches) > 0
+
+
+def fetch_event_resources(event: Event, season: int) -> EventResources:
+    """
+    Download the roster, qualification matches and scores of an event
+    :param event: Event to download resources for
+    :param season: Season the event belongs to
+    :return: EventResources for the event
+    """
+    team_list = event.team_list
+    matches = get_event_matches(event.event_code, season)
+    event_data = get_season_score_parser(season).parse(event.event_code)
+
+    return EventResources(event, team_list, matches, event_data)
+
+
+def prefetch_events(events: list[Event], fetch: Callable[[Event], EventResources],
+                    depth: int = 8, workers: int = 4) -> Iterator[EventResources]:
+    """
+    Fetch resources for upcoming events on a bounded thread pool while yielding them in the original order.
+    At most depth events are in flight at once, so memory stays bounded on a full-season run.
+    :param events: Events in the order they must be processed
+    :param fetch: Function downloading the resources for a single event
+    :param depth: Number of events fetched ahead of the one being processed
+    :param workers: Number of threads used for fetching
+    :return: Iterator of EventResources in the same order as events
+    """
+    if depth <= 1 or workers <= 1:
+        for event in events:
+            yield fetch(event)
+        return
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="prefetch") as executor:
+        pending = deque()
+        upcoming = iter(events)
+
+        for event in upcoming:
+            pending.append(executor.submit(fetch, event))
+            if len(pending) >= depth:
+                break
+
+        try:
+            while pending:
+                resources = pending.popleft().result()
+
+                next_event = next(upcoming, None)
+                if next_event is not None:
+                    pending.append(executor.submit(fetch, next_event))
+
+                yield resources
+        finally:
+            # Don't download events nobody will process if the consumer stops early
+            for future in pending:
+                future.cancel()
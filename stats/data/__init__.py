@@ -1,6 +1,5 @@
 import os
 import tomllib
-from pathlib import Path
 
 from dotenv import load_dotenv
 from datetime import datetime
@@ -8,29 +7,36 @@ from datetime import datetime
 from stats.data.scores import get_season_score_parser
 
 
+_dotenv_loaded = False
+
+
 def get_auth():
     """
-    Get the authentication header required for FIRST API calls from environment variables
+    Get the authentication header required for FIRST API calls from environment variables.
+    The .env file is only read the first time this is called.
 
     :return
         A tuple containing the username and token
     """
-    load_dotenv()
+    global _dotenv_loaded
+    if not _dotenv_loaded:
+        load_dotenv()
+        _dotenv_loaded = True
     return os.getenv("API_USER"), os.getenv("API_TOKEN")
 
 
 def get_config():
-    file_path = '../config.toml'
-
-    script_dir = Path(__file__).resolve().parent
-    target_file_path = script_dir / file_path
+    """
+    Get the parsed config.toml as a dictionary. The file is only parsed again when it changes on disk,
+    prefer get_settings() for typed access.
+    :return: Config dictionary, None if the file is missing or invalid
+    """
+    from stats.data.settings import CONFIG_PATH, get_settings
 
     try:
-        with open(target_file_path, 'rb') as file:
-            config = tomllib.load(file)
-        return config
+        return get_settings().raw
     except FileNotFoundError:
-        print(f"Error: File not found at {target_file_path}")
+        print(f"Error: File not found at {CONFIG_PATH}")
         return None
     except tomllib.TOMLDecodeError as e:
         print(f"Error parsing config TOML file: {e}")
@@ -1,24 +1,36 @@
 import requests
-from stats.data import get_auth, get_config
+from stats.data.client import get_client
+from stats.data.settings import get_settings
 from stats.teams.Team import Team
 
 
-def get_team_from_ftc(team_number: int) -> Team:
+def get_team_from_ftc(team_number: int, season: int = None, directory=None) -> Team:
     """
-    Get a team object from a team number from querying the FTC API
+    Get a team object from a team number using the season's team directory, only querying the FTC API
+    for teams that are missing from it (e.g. registered since the directory was downloaded)
     :param team_number: Valid FTC Team Number
+    :param season: OPTIONAL, season to query, defaults to the configured season
+    :param directory: OPTIONAL, TeamDirectory of the season, resolved once by callers creating many teams
     :return: Team object without any games played
     """
-    season = get_config()['season']
-    team_response = requests.get(
-        f"https://ftc-api.firstinspires.org/v2.0/{season}/teams?teamNumber={team_number}",
-        auth=get_auth()
-    )
+    # Move the import here to avoid circular import
+    from stats.teams.directory import get_team_directory
 
-    if team_response.status_code == 400:
-        raise ValueError(f"The team number {team_number} you tried to find does not exist.")
+    if season is None:
+        season = get_settings().season
+
+    if directory is None:
+        directory = get_team_directory(season)
+    team_data = directory.get(team_number)
+
+    if team_data is None:
+        team_response = get_client().get(f"/{season}/teams", params={'teamNumber': team_number})
+
+        if team_response.status_code == 400:
+            raise ValueError(f"The team number {team_number} you tried to find does not exist.")
 
-    team_data = team_response.json()['teams'][0]
+        team_data = team_response.json()['teams'][0]
+        directory.add(team_data)
 
     team = Team(
         team_number=team_number,
@@ -0,0 +1,126 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+DEFAULT_CACHE_PATH = os.path.join(tempfile.gettempdir(), "nighthawks-stats", "first-api-cache.sqlite3")
+
+
+class CachedResponse:
+    """
+    Body of a previously downloaded FIRST API response and the Last-Modified header it was served with
+    """
+
+    def __init__(self, url: str, body: bytes, last_modified: str):
+        self.url = url
+        self.body = body
+        self.last_modified = last_modified
+
+
+class ResponseCache:
+    """
+    Persistent, size-bounded cache of FIRST API response bodies keyed by URL.
+    Entries are revalidated with If-Modified-Since, and the least recently used entries are evicted
+    once the total size of stored bodies goes over max_bytes.
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, max_bytes: int = 256 * 1024 * 1024):
+        """
+        :param path: Location of the SQLite file used to persist responses between runs
+        :param max_bytes: Maximum total size of cached bodies before old entries are evicted
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                url TEXT PRIMARY KEY,
+                body BLOB NOT NULL,
+                last_modified TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access)")
+        self._conn.commit()
+
+    def lookup(self, url: str) -> CachedResponse | None:
+        """
+        :param url: Full request URL, including the query string
+        :return: The cached response for the URL or None if it has not been cached
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT body, last_modified FROM responses WHERE url = ?", (url,)).fetchone()
+        if row is None:
+            return None
+        return CachedResponse(url, row[0], row[1])
+
+    def record_hit(self, url: str):
+        """
+        Mark a cached entry as served after the API confirmed it has not changed (304)
+        """
+        with self._lock:
+            self.hits += 1
+            self._conn.execute("UPDATE responses SET last_access = ? WHERE url = ?", (time.time(), url))
+            self._conn.commit()
+
+    def record_miss(self):
+        with self._lock:
+            self.misses += 1
+
+    def store(self, url: str, body: bytes, last_modified: str):
+        """
+        Save a response body, evicting the least recently used entries if the cache is over its size limit
+        :param url: Full request URL, including the query string
+        :param body: Raw response body
+        :param last_modified: Value of the Last-Modified header sent with the body
+        """
+        if len(body) > self.max_bytes:
+            return
+
+        with self._lock:
+            self.stores += 1
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (url, body, last_modified, size, last_access) VALUES (?, ?, ?, ?, ?)",
+                (url, body, last_modified, len(body), time.time())
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        rows = self._conn.execute("SELECT url, size FROM responses ORDER BY last_access").fetchall()
+        for url, size in rows:
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM responses WHERE url = ?", (url,))
+            total -= size
+            self.evictions += 1
+
+    def size(self) -> int:
+        """
+        :return: Total size in bytes of all cached bodies
+        """
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def report(self) -> str:
+        """
+        :return: Human-readable summary of hits, misses and evictions since the cache was opened
+        """
+        requests = self.hits + self.misses
+        hit_rate = self.hits / requests * 100 if requests else 0.0
+        return (f"response cache: {self.hits} hits, {self.misses} misses ({hit_rate:.1f}% hit rate), "
+                f"{self.stores} stored, {self.evictions} evicted, {self.size() / 1024 / 1024:.1f} MiB on disk")
@@ -0,0 +1,293 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from stats.data import get_auth
+from stats.data.cache import ResponseCache, DEFAULT_CACHE_PATH
+from stats.data.memo import RequestMemo
+from stats.data.scheduler import Priority, RequestScheduler, parse_retry_after
+from stats.data.settings import get_settings
+
+FIRST_API_BASE_URL = "https://ftc-api.firstinspires.org/v2.0"
+
+
+class EndpointStats:
+    """
+    Latency counters for a single FIRST API endpoint (events, teams, matches, scores...)
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def record(self, seconds: float, ok: bool):
+        self.calls += 1
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        if not ok:
+            self.errors += 1
+
+    def as_dict(self):
+        return {
+            'calls': self.calls,
+            'errors': self.errors,
+            'total_seconds': round(self.total_seconds, 3),
+            'avg_seconds': round(self.total_seconds / self.calls, 3) if self.calls else 0.0,
+            'max_seconds': round(self.max_seconds, 3)
+        }
+
+
+class FirstApiClient:
+    """
+    Shared HTTP client for the FIRST API. Keeps a pool of keep-alive connections, always talks HTTPS,
+    applies timeouts and retries transient failures with exponential backoff. Every request goes through
+    the rate limit scheduler, and 429 responses are retried after the Retry-After delay.
+    """
+
+    def __init__(self, base_url: str = FIRST_API_BASE_URL, timeout: float = 30, retries: int = 3,
+                 backoff_factor: float = 0.5, pool_size: int = 16, cache: ResponseCache = None,
+                 scheduler: RequestScheduler = None, throttle_retries: int = 5):
+        """
+        :param base_url: Base URL of the FIRST API, without a trailing slash
+        :param timeout: Seconds to wait on the connection and on each read before giving up
+        :param retries: Number of retries for connection errors and 5xx responses
+        :param backoff_factor: Exponential backoff factor between retries (0.5 -> 0.5s, 1s, 2s...)
+        :param pool_size: Maximum number of pooled connections kept alive to the API host
+        :param cache: OPTIONAL, response cache used by requests made with use_cache=True
+        :param scheduler: OPTIONAL, rate limit scheduler requests must acquire a token from
+        :param throttle_retries: Number of times a request is retried after a 429 response
+        """
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.cache = cache
+        self.scheduler = scheduler or RequestScheduler()
+        self.throttle_retries = throttle_retries
+
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(500, 502, 503, 504),
+            allowed_methods=("GET",),
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.auth = get_auth()
+
+        self._stats: dict[str, EndpointStats] = {}
+        self._stats_lock = threading.Lock()
+
+        self.memo: RequestMemo | None = None
+        self._runs = 0
+        self._runs_lock = threading.Lock()
+
+    def url(self, path: str) -> str:
+        """
+        Build an absolute API URL from a path such as /2025/teams
+        """
+        return f"{self.base_url}/{path.lstrip('/')}"
+
+    def full_url(self, path: str, params: dict = None) -> str:
+        """
+        Build an absolute API URL including the encoded query string
+        """
+        return requests.Request('GET', self.url(path), params=params).prepare().url
+
+    @contextmanager
+    def run_scope(self):
+        """
+        Context manager for a bulk run (rebuild, cron...). While it is open, concurrent bulk requests for the
+        same URL share one response, and responses requested with memoize are kept so they are only sent
+        once per run. Nested scopes share the outer scope's memo.
+        :return: The RequestMemo of the run
+        """
+        with self._runs_lock:
+            if self._runs == 0:
+                self.memo = RequestMemo()
+            self._runs += 1
+            memo = self.memo
+        try:
+            yield memo
+        finally:
+            with self._runs_lock:
+                self._runs -= 1
+                if self._runs == 0:
+                    self.memo = None
+
+    def get(self, path: str, params: dict = None, timeout: float = None, use_cache: bool = False,
+            priority: Priority = Priority.BULK, memoize: bool = False) -> requests.Response:
+        """
+        Make a GET request to the FIRST API
+        :param path: Path relative to the API base URL (e.g. /2025/events)
+        :param params: OPTIONAL, query string parameters
+        :param timeout: OPTIONAL, override the client timeout for this request
+        :param use_cache: OPTIONAL, revalidate against the response cache and serve the cached body on a 304
+        :param priority: OPTIONAL, priority class used by the rate limit scheduler (bulk by default)
+        :param memoize: OPTIONAL, keep a successful response for the rest of the run. Only for resources
+                        requested several times per run (rosters, the event list), everything else is
+                        forgotten once the request completes so a run's memory stays bounded
+        :return: Response object
+        """
+        memo = self.memo
+        if memo is not None and priority == Priority.BULK:
+            return memo.fetch(
+                self.full_url(path, params),
+                lambda: self._get(path, params, timeout, use_cache, priority),
+                keep=lambda response: memoize and response.status_code == 200
+            )
+        return self._get(path, params, timeout, use_cache, priority)
+
+    def _get(self, path: str, params: dict, timeout: float, use_cache: bool, priority: Priority) -> requests.Response:
+        if use_cache and self.cache is not None:
+            return self._get_cached(path, params, timeout, priority)
+        return self._send(path, params, timeout, priority)
+
+    def _send(self, path: str, params: dict = None, timeout: float = None, priority: Priority = Priority.BULK,
+              headers: dict = None) -> requests.Response:
+        for attempt in range(self.throttle_retries + 1):
+            self.scheduler.acquire(priority)
+
+            start = time.perf_counter()
+            ok = False
+            try:
+                response = self.session.get(self.url(path), params=params, timeout=timeout or self.timeout,
+                                            headers=headers)
+                ok = response.status_code < 400
+            finally:
+                self._record(endpoint_name(path), time.perf_counter() - start, ok)
+
+            if response.status_code != 429:
+                self.scheduler.on_success()
+                return response
+
+            self.scheduler.on_throttled(parse_retry_after(response.headers.get('Retry-After')))
+
+        return response
+
+    def _get_cached(self, path: str, params: dict = None, timeout: float = None,
+                    priority: Priority = Priority.BULK) -> requests.Response:
+        url = self.full_url(path, params)
+        cached = self.cache.lookup(url)
+
+        headers = {'If-Modified-Since': cached.last_modified} if cached else None
+        response = self._send(path, params, timeout, priority, headers)
+
+        if cached and response.status_code == 304:
+            self.cache.record_hit(url)
+            return cached_response(cached, response)
+
+        self.cache.record_miss()
+        last_modified = response.headers.get('Last-Modified')
+        if response.status_code == 200 and last_modified:
+            self.cache.store(url, response.content, last_modified)
+        return response
+
+    def _record(self, endpoint: str, seconds: float, ok: bool):
+        with self._stats_lock:
+            if endpoint not in self._stats:
+                self._stats[endpoint] = EndpointStats()
+            self._stats[endpoint].record(seconds, ok)
+
+    def get_stats(self) -> dict[str, dict]:
+        """
+        :return: Latency counters for each endpoint called so far (key = endpoint, value = counters)
+        """
+        with self._stats_lock:
+            return {endpoint: stats.as_dict() for endpoint, stats in self._stats.items()}
+
+    def report(self) -> str:
+        """
+        :return: Human-readable summary of calls and latency per endpoint
+        """
+        lines = []
+        for endpoint, stats in sorted(self.get_stats().items()):
+            lines.append(f"{endpoint}: {stats['calls']} calls, {stats['errors']} errors, "
+                         f"avg {stats['avg_seconds']}s, max {stats['max_seconds']}s")
+        lines.append(self.scheduler.report())
+        if self.memo is not None:
+            lines.append(self.memo.report())
+        if self.cache is not None:
+            lines.append(self.cache.report())
+        return "\n".join(lines)
+
+
+def cached_response(cached, not_modified: requests.Response) -> requests.Response:
+    """
+    Build a 200 response from a cached body after the API answered 304 Not Modified
+    :param cached: CachedResponse that was revalidated
+    :param not_modified: The 304 response returned by the API
+    :return: Response object carrying the cached body
+    """
+    response = requests.Response()
+    response.status_code = 200
+    response.url = cached.url
+    response.headers.update(not_modified.headers)
+    response.headers.pop('Content-Length', None)
+    response.headers.pop('Content-Encoding', None)
+    response.headers['Last-Modified'] = cached.last_modified
+    response.encoding = 'utf-8'
+    response._content = cached.body
+    response.request = not_modified.request
+    return response
+
+
+def endpoint_name(path: str) -> str:
+    """
+    Get the endpoint a path belongs to, ignoring the season (e.g. /2025/teams?eventCode=X -> teams)
+    """
+    parts = [part for part in path.split('?')[0].split('/') if part]
+    if parts and parts[0].isdigit():
+        parts = parts[1:]
+    return parts[0] if parts else "/"
+
+
+_client: FirstApiClient | None = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> FirstApiClient:
+    """
+    Get the shared FIRST API client, creating it on first use from the [api] section of the config
+    :return: FirstApiClient shared by every module
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                settings = get_settings()
+                api_config = settings.section('api')
+                cache_config = settings.section('cache')
+
+                cache = None
+                if cache_config.get('enabled', True):
+                    cache = ResponseCache(
+                        path=os.getenv('FIRST_API_CACHE_PATH') or cache_config.get('path') or DEFAULT_CACHE_PATH,
+                        max_bytes=int(cache_config.get('max_megabytes', 256) * 1024 * 1024)
+                    )
+
+                scheduler = RequestScheduler(
+                    requests_per_second=api_config.get('requests_per_second', 10),
+                    burst=api_config.get('burst', 20),
+                    interactive_reserve=api_config.get('interactive_reserve', 4)
+                )
+
+                _client = FirstApiClient(
+                    base_url=api_config.get('base_url', FIRST_API_BASE_URL),
+                    timeout=api_config.get('timeout', 30),
+                    retries=api_config.get('retries', 3),
+                    backoff_factor=api_config.get('backoff_factor', 0.5),
+                    pool_size=api_config.get('pool_size', 16),
+                    cache=cache,
+                    scheduler=scheduler,
+                    throttle_retries=api_config.get('throttle_retries', 5)
+                )
+    return _client
@@ -0,0 +1,87 @@
+import threading
+from concurrent.futures import Future
+from typing import Callable, Hashable
+
+
+class SingleFlight:
+    """
+    Runs a function at most once per key at a time. Callers asking for a key that is already being
+    computed wait for that result instead of starting their own call.
+    """
+
+    def __init__(self):
+        self._futures: dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, fn: Callable, keep: Callable[[object], bool] = lambda result: False):
+        """
+        :param key: Key identifying the call
+        :param fn: Function computing the result when no call for the key is in flight
+        :param keep: OPTIONAL, returns True if a result should be remembered for later callers
+                     instead of being forgotten once the call completes
+        :return: Result of fn, possibly computed by another caller
+        """
+        with self._lock:
+            future = self._futures.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._futures[key] = future
+
+        if not leader:
+            self._on_shared(key)
+            return future.result()
+
+        try:
+            result = fn()
+        except BaseException as e:
+            self._forget(key)
+            future.set_exception(e)
+            raise
+
+        if not keep(result):
+            self._forget(key)
+        future.set_result(result)
+        return result
+
+    def _forget(self, key: Hashable):
+        with self._lock:
+            self._futures.pop(key, None)
+
+    def _on_shared(self, key: Hashable):
+        pass
+
+
+class RequestMemo(SingleFlight):
+    """
+    Shares upstream responses between the modules and threads of a run. Concurrent requests for a resource
+    share one download, and the responses the caller chooses to keep are reused for the rest of the run.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.requests = 0
+        self.saved = 0
+        self._count_lock = threading.Lock()
+
+    def fetch(self, key: Hashable, fn: Callable, keep: Callable[[object], bool] = lambda result: True):
+        """
+        :param key: Key identifying the resource, usually the full URL
+        :param fn: Function downloading the resource
+        :param keep: OPTIONAL, returns False for results (e.g. failed responses) that should not be reused
+        :return: The remembered or freshly downloaded result
+        """
+        with self._count_lock:
+            self.requests += 1
+        return self.do(key, fn, keep)
+
+    def _on_shared(self, key: Hashable):
+        with self._count_lock:
+            self.saved += 1
+
+    def report(self) -> str:
+        """
+        :return: Human-readable summary of how many duplicate requests were avoided
+        """
+        return f"request memo: {self.requests} requests, {self.saved} duplicates saved, " \
+               f"{self.requests - self.saved} sent upstream"
@@ -1,18 +1,15 @@
 
-import requests
-from stats.data import get_config
-from stats.data.scores import AllianceScoreData, MatchData, EventData
+from stats.data.client import get_client
+from stats.data.scores import AllianceScoreData, MatchData, EventData, SeasonScoreParser
 
-class DecodeScoreParser:
+class DecodeScoreParser(SeasonScoreParser):
     def parse(self, event_code: str) -> EventData:
-        from stats.data import get_auth
-        season = get_config()['season']
-        r = requests.get(
-            f"https://ftc-api.firstinspires.org/v2.0/2025/scores/" + event_code + "/qual",
-                                auth=get_auth()
-        )
-        print(r.status_code)
-        print(r.text)
+        season = self.season
+        r = get_client().get(f"/{season}/scores/{event_code}/qual", use_cache=True)
+
+        if r.status_code != 200:
+            raise ValueError(f"Scores for event {event_code} could not be retrieved (status {r.status_code}).")
+
         data = r.json()
 
         event_data = EventData()
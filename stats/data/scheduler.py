@@ -0,0 +1,137 @@
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from enum import IntEnum
+
+
+class Priority(IntEnum):
+    """
+    Priority classes for upstream requests, lower values are served first
+    """
+    INTERACTIVE = 0  # Requests a user is waiting on (e.g. the event proxy endpoints)
+    BULK = 1  # Background traffic such as the daily cron and full rebuilds
+
+
+class RequestScheduler:
+    """
+    Token bucket shared by every FIRST API request.
+
+    Tokens refill at the current rate up to burst. Interactive requests may take any available token,
+    while bulk requests leave interactive_reserve tokens in the bucket and always yield to waiting
+    interactive requests, so background jobs use the remaining quota without slowing live traffic.
+    When the API answers 429 the bucket pauses for Retry-After and the rate is halved, then it
+    recovers additively after each successful request.
+    """
+
+    def __init__(self, requests_per_second: float = 10, burst: int = 20, interactive_reserve: int = 4,
+                 min_rate: float = 0.5, recovery_step: float = 0.1):
+        """
+        :param requests_per_second: Maximum sustained request rate
+        :param burst: Maximum number of tokens that can build up in the bucket
+        :param interactive_reserve: Tokens bulk requests are not allowed to take
+        :param min_rate: Lowest rate adaptive backoff will drop to
+        :param recovery_step: Requests per second added back to the rate after each success
+        """
+        self.max_rate = requests_per_second
+        self.rate = requests_per_second
+        self.burst = max(burst, interactive_reserve + 1)
+        self.interactive_reserve = interactive_reserve
+        self.min_rate = min(min_rate, requests_per_second)
+        self.recovery_step = recovery_step
+
+        self.throttled = 0
+
+        self._tokens = float(self.burst)
+        self._last_refill = time.monotonic()
+        self._paused_until = 0.0
+        self._waiting = {priority: 0 for priority in Priority}
+        self._condition = threading.Condition()
+
+    def acquire(self, priority: Priority = Priority.BULK):
+        """
+        Block until a request of the given priority is allowed to go out
+        :param priority: Priority class of the request
+        :return: None
+        """
+        with self._condition:
+            self._waiting[priority] += 1
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+
+                    if now < self._paused_until:
+                        self._condition.wait(self._paused_until - now)
+                        continue
+
+                    needed = 1.0 if priority == Priority.INTERACTIVE else 1.0 + self.interactive_reserve
+                    blocked = priority != Priority.INTERACTIVE and self._waiting[Priority.INTERACTIVE] > 0
+
+                    if not blocked and self._tokens >= needed:
+                        self._tokens -= 1.0
+                        return
+
+                    self._condition.wait(max((needed - self._tokens) / self.rate, 0.01))
+            finally:
+                self._waiting[priority] -= 1
+                self._condition.notify_all()
+
+    def on_throttled(self, retry_after: float | None):
+        """
+        Back off after the API answered 429 Too Many Requests
+        :param retry_after: Seconds the API asked us to wait, None if it didn't say
+        :return: None
+        """
+        with self._condition:
+            self.throttled += 1
+            self.rate = max(self.rate / 2, self.min_rate)
+
+            wait = retry_after if retry_after is not None else 1.0 / self.rate
+            self._paused_until = max(self._paused_until, time.monotonic() + wait)
+            self._tokens = 0.0
+            self._condition.notify_all()
+
+    def on_success(self):
+        """
+        Let the rate recover towards its configured maximum after a successful request
+        """
+        if self.rate >= self.max_rate:
+            return
+        with self._condition:
+            self.rate = min(self.rate + self.recovery_step, self.max_rate)
+
+    def _refill(self, now: float):
+        # No tokens build up while paused after a 429
+        elapsed = max(now - max(self._last_refill, self._paused_until), 0.0)
+        self._last_refill = now
+        self._tokens = min(self._tokens + elapsed * self.rate, float(self.burst))
+
+    def report(self) -> str:
+        """
+        :return: Human-readable summary of the scheduler state
+        """
+        return f"scheduler: {self.rate:.1f}/{self.max_rate:.1f} requests/s, throttled {self.throttled} times"
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """
+    Parse a Retry-After header given either in seconds or as an HTTP date
+    :param value: Raw header value
+    :return: Seconds to wait, None if the header is missing or invalid
+    """
+    if not value:
+        return None
+
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
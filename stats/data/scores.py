@@ -1,5 +1,10 @@
+import re
+import sys
 from abc import abstractmethod
 
+# Match names are {season}{event code}{level}{number}, e.g. 2025USCAFRQ12
+MATCH_NAME_PATTERN = re.compile(r'^(\d{4})(.+)([QP])(\d+)$')
+
 
 class AllianceScoreData:
     """
@@ -44,7 +49,22 @@ class MatchData:
         self.blue_alliance = blue_scores
 
     def get_match_name(self):
-        return f"{self.season}{self.event_code}{self.match_level}{self.match_number}"
+        # Interned so every team that played the match shares the same string
+        return sys.intern(f"{self.season}{self.event_code}{self.match_level}{self.match_number}")
+
+
+def parse_match_name(match_name: str) -> tuple[int, str, str, int] | None:
+    """
+    Split a match name created by MatchData.get_match_name back into its parts
+    :param match_name: Match name such as 2025USCAFRQ12
+    :return: Tuple of season, event code, match level and match number, None if the name is not a match (e.g. START)
+    """
+    parts = MATCH_NAME_PATTERN.match(match_name)
+    if parts is None:
+        return None
+
+    season, event_code, match_level, match_number = parts.groups()
+    return int(season), event_code, match_level, int(match_number)
 
 
 class EventData:
@@ -72,6 +92,12 @@ class EventData:
 
 
 class SeasonScoreParser:
+    def __init__(self, season: int):
+        """
+        :param season: FTC API season year the parser downloads scores for
+        """
+        self.season = season
+
     @abstractmethod
     def parse(self, event_code) -> EventData:
         """
@@ -93,7 +119,7 @@ def get_season_score_parser(season: int):
     # noinspection PyUnreachableCode
     match season:
         case 2025:
-            return DecodeScoreParser()
+            return DecodeScoreParser(season)
         case _:
             raise ValueError("The season you tried to look for does not have a designated score parser yet. "
                              "Make sure your desired year is correct or create and add a new season score parser")
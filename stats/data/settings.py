@@ -0,0 +1,123 @@
+import copy
+import os
+import threading
+import tomllib
+from pathlib import Path
+
+CONFIG_PATH = Path(__file__).resolve().parent.parent / 'config.toml'
+
+
+class AverageSettings:
+    """
+    Start of season averages used to seed EPA calculations
+    """
+
+    def __init__(self, use_predetermined: bool, total: float, auto: float, tele: float):
+        """
+        :param use_predetermined: True if the following averages should be used, false to calculate them at runtime
+        :param total: Average total score
+        :param auto: Average auto score
+        :param tele: Average teleop score
+        """
+        self.use_predetermined = use_predetermined
+        self.total = total
+        self.auto = auto
+        self.tele = tele
+
+
+class Settings:
+    """
+    Typed view of config.toml for a single season
+    """
+
+    def __init__(self, raw: dict):
+        """
+        :param raw: Parsed config.toml with any per-season overrides already applied
+        """
+        self.raw = raw
+        self.season: int = raw['season']
+        self.allowed_events: list[int] = raw['allowed_events']
+
+        averages = raw.get('averages', {})
+        self.averages = AverageSettings(
+            use_predetermined=averages.get('use_predetermined', False),
+            total=averages.get('total', 0.0),
+            auto=averages.get('auto', 0.0),
+            tele=averages.get('tele', 0.0)
+        )
+
+    def section(self, name: str) -> dict:
+        """
+        :param name: Name of a config table such as api, cache or pipeline
+        :return: The table, or an empty dictionary if it is missing from the config
+        """
+        return self.raw.get(name, {})
+
+    def for_season(self, season: int) -> 'Settings':
+        """
+        Get settings for another season, applying its [seasons.<year>] overrides
+        :param season: FTC API season year
+        :return: Settings for the season
+        """
+        return Settings(apply_season_overrides(self.raw, season))
+
+
+def apply_season_overrides(raw: dict, season: int) -> dict:
+    """
+    Merge the [seasons.<year>] table of a config into its top level values
+    :param raw: Parsed config.toml
+    :param season: FTC API season year
+    :return: New config dictionary for the season
+    """
+    merged = copy.deepcopy(raw)
+    merged['season'] = season
+
+    overrides = raw.get('seasons', {}).get(str(season), {})
+    for key, value in overrides.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = {**merged[key], **value}
+        else:
+            merged[key] = value
+
+    return merged
+
+
+class SettingsLoader:
+    """
+    Loads config.toml once and only parses it again when the file's modification time changes
+    """
+
+    def __init__(self, path: Path = CONFIG_PATH):
+        self.path = path
+        self._mtime = None
+        self._settings: Settings | None = None
+        self._lock = threading.Lock()
+
+    def get(self) -> Settings:
+        """
+        :return: Settings for the configured season, reloaded if config.toml changed since the last call
+        """
+        mtime = os.stat(self.path).st_mtime_ns
+        if self._settings is None or mtime != self._mtime:
+            with self._lock:
+                if self._settings is None or mtime != self._mtime:
+                    with open(self.path, 'rb') as file:
+                        raw = tomllib.load(file)
+                    self._settings = Settings(apply_season_overrides(raw, raw['season']))
+                    self._mtime = mtime
+        return self._settings
+
+
+_loader = SettingsLoader()
+
+
+def get_settings(season: int = None) -> Settings:
+    """
+    Get the cached settings, optionally for a season other than the configured one
+    :param season: OPTIONAL, FTC API season year whose [seasons.<year>] overrides should be applied
+    :return: Settings object
+    """
+    settings = _loader.get()
+    if season is not None and season != settings.season:
+        return settings.for_season(season)
+    return settings
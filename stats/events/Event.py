@@ -1,12 +1,13 @@
 class Event:
-  def __init__(self, event):
+  def __init__(self, event, season: int = None, team_list: list[int] = None):
     """
     :param event: JSON response from FTC API for that event
+    :param season: OPTIONAL, season the event belongs to, defaults to the configured season
+    :param team_list: OPTIONAL, already known roster. Otherwise it is downloaded the first time team_list is read
     """
-    from stats.events import create_team_list
-
     self.event_code = event['code']
     self.name = event['name']
+    self.season = season
 
     # Location Info
     self.country = event['country']
@@ -16,7 +17,27 @@ class Event:
     self.dateStart = event['dateStart']
     self.dateEnd = event['dateEnd']
 
-    self.team_list = create_team_list(event['code'])
+    self._team_list = team_list
+
+  @property
+  def team_list(self) -> list[int]:
+    """
+    Team numbers of the event's roster, downloaded on first access
+    """
+    if self._team_list is None:
+      from stats.events import create_team_list
+      self._team_list = create_team_list(self.event_code, self.season)
+    return self._team_list
+
+  @team_list.setter
+  def team_list(self, team_list: list[int]):
+    self._team_list = team_list
+
+  def has_team_list(self) -> bool:
+    """
+    :return: True if the roster has already been downloaded or given
+    """
+    return self._team_list is not None
 
   def __repr__(self):
     return f"{self.event_code, self.name}"
@@ -1,25 +1,46 @@
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, datetime
 
-import requests
-
-from stats.data import get_config, get_auth
+from stats.data.client import get_client
+from stats.data.settings import Settings, get_settings
 from stats.events.Event import Event
+from stats.events.catalog import get_event_catalog
 from stats.teams import get_team_data_from_event, get_teams_at_event
 
-def create_team_list(event_code: str) -> list[int]:
+def create_team_list(event_code: str, season: int = None) -> list[int]:
   """
   Generate a list of team numbers from an event given an event code
   :param event_code: FIRST Event Code
+  :param season: OPTIONAL, season to query, defaults to the configured season
   :return: List of all team's numbers from the event
   """
-  season = get_config()['season']
+  return get_teams_at_event(event_code, season)
+
 
-  team_response = requests.get(f"https://ftc-api.firstinspires.org/v2.0/{season}/teams?eventCode="+event_code, auth=get_auth())
-  teams_at_comp = team_response.json()['teams']
+def load_team_lists(events: list[Event], workers: int = None) -> None:
+  """
+  Download the rosters of many events at once on a thread pool. Events whose roster is already known
+  are skipped, and events whose roster can't be downloaded are given an empty roster.
+  :param events: Events to fill the team_list of
+  :param workers: OPTIONAL, number of download threads, defaults to the [pipeline] workers setting
+  :return: None
+  """
+  missing = [event for event in events if not event.has_team_list()]
+  if not missing:
+    return
 
-  teams = [team['teamNumber'] for team in teams_at_comp]
+  if workers is None:
+    workers = get_settings().section('pipeline').get('workers', 4)
 
-  return teams
+  def load(event: Event):
+    try:
+      event.team_list = create_team_list(event.event_code, event.season)
+    except Exception as e:
+      print(f"Error loading teams for event {event.event_code}: {e}")
+      event.team_list = []
+
+  with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+    list(executor.map(load, missing))
 
 
 def get_event(event_code: str) -> Event:
@@ -28,18 +49,13 @@ def get_event(event_code: str) -> Event:
   :param event_code: Valid FTC Event Code
   :return: Event object
   """
-  season = get_config()['season']
-  event_response = requests.get(f"http://ftc-api.firstinspires.org/v2.0/{season}/events?eventCode={event_code}",
-                                auth=get_auth())
+  season = get_settings().season
+  event_data = get_event_catalog(season).get(event_code)
 
-  if event_response.status_code == 404:
+  if event_data is None:
     raise ValueError(f"The event {event_code} you tried to find does not exist.")
 
-  print("STATUS:", event_response.status_code)
-  print("RAW:", event_response.text[:300])
-  event_data = event_response.json()['events'][0]
-
-  return Event(event_data)
+  return Event(event_data, season)
 
 
 def get_division_events(event_code: str) -> list[Event]:
@@ -48,52 +64,27 @@ def get_division_events(event_code: str) -> list[Event]:
   :param event_code: Event code to find division events from
   :return: List of division events, empty if none
   """
-  season = get_config()['season']
-  division_events: list[Event] = []
-
-  event_response = requests.get(f"http://ftc-api.firstinspires.org/v2.0/{season}/events", auth=get_auth())
-  all_event_data = event_response.json()['events']
+  season = get_settings().season
+  return [Event(event_data, season) for event_data in get_event_catalog(season).divisions(event_code)]
 
-  division_event_codes = [event['code'] for event in all_event_data if event['divisionCode'] == event_code]
-  for event_code in division_event_codes:
-    division_events.append(get_event(event_code))
 
-  return division_events
-
-
-def get_all_events(region: str = "", min_date: date = date.min, max_date: date = date.max) -> list[Event]:
+def get_all_events(region: str = "", min_date: date = date.min, max_date: date = date.max,
+                   settings: Settings = None) -> list[Event]:
   """
   Get all events within parameters. By default, returns all events.
   :param region: OPTIONAL, get events from a certain region with given region code
   :param min_date: OPTIONAL, get events that end after a certain date
   :param max_date: OPTIONAL, get events that end before a certain date
+  :param settings: OPTIONAL, settings to use instead of the configured ones
   :return: List of all events that fit the given criteria
   """
-  from stats.events.Event import Event
-  config = get_config()
-
-  valid_events = config['allowed_events']
-  season = config['season']
-
-  event_response = requests.get(f"http://ftc-api.firstinspires.org/v2.0/{season}/events", auth=get_auth())
-  all_event_data = event_response.json().get('events', [])
-
-  events: list[Event] = []
-
-  for event_data in all_event_data:
-    # If we specify a region, and the event is not in that region skip it
-    if region and region != event_data['regionCode']: continue
-
-    # If the event does not fall between the min/max dates skip it
-    end_date = datetime.fromisoformat(event_data['dateEnd']).date()
-    if end_date < min_date or end_date > max_date: continue
+  if settings is None:
+    settings = get_settings()
 
-    # If the event is not an allowed event type skip it
-    event_type = int(event_data['type'])
-    if event_type not in valid_events: continue
+  season = settings.season
+  all_event_data = get_event_catalog(season).query(region, min_date, max_date, settings.allowed_events)
 
-
-    events.append(Event(event_data))
+  events = [Event(event_data, season) for event_data in all_event_data]
 
   # Sort by ascending start date
   events.sort(key=lambda event: datetime.fromisoformat(event.dateStart).date())
@@ -107,8 +98,8 @@ def get_event_rankings(event_code: str) -> dict[int, int]:
   :param event_code: Valid FTC Event Code
   :return: Dictionary where the key is a team number and the value is the team's rank at the evvent, empty if no ranking
   """
-  season = get_config()['season']
-  rank_response = requests.get(f"http://ftc-api.firstinspires.org/v2.0/{season}/rankings/{event_code}", auth=get_auth())
+  season = get_settings().season
+  rank_response = get_client().get(f"/{season}/rankings/{event_code}")
 
   if rank_response.status_code == 404:
     raise ValueError(f"The event {event_code} you tried to find does not exist.")
@@ -119,6 +110,20 @@ def get_event_rankings(event_code: str) -> dict[int, int]:
   return rankings
 
 
+def get_event_matches(event_code: str, season: int = None) -> list[dict]:
+  """
+  Get the qualification matches played at an event, including which teams played on which alliance
+  :param event_code: Valid FTC Event Code
+  :param season: OPTIONAL, season to query, defaults to the configured season
+  :return: List of matches as returned by the FIRST API
+  """
+  if season is None:
+    season = get_settings().season
+  response = get_client().get(f"/{season}/matches/{event_code}", params={'tournamentLevel': 'qual'}, use_cache=True)
+
+  return response.json()['matches']  # only grab from qualifiers to equally compare all teams
+
+
 def event_has_teams(event_code: str) -> bool:
   try:
     teams = get_teams_at_event(event_code)
@@ -130,34 +135,19 @@ def event_has_teams(event_code: str) -> bool:
 
 def get_event_by_code(event_code: str):
   """
-  Fetch a single event from the FTC API by event code
+  Find a single event of the season by event code
   and return it as an Event object, or None if invalid.
   """
-  from stats.events.Event import Event
+  settings = get_settings()
+  season = settings.season
 
-  config = get_config()
-  season = config['season']
-  valid_events = config['allowed_events']
-
-  # FTC API endpoint for a single event
-  response = requests.get(
-    f"http://ftc-api.firstinspires.org/v2.0/{season}/events/{event_code}",
-    auth=get_auth()
-  )
-
-  if response.status_code != 200:
-    return None
-
-  event_data = response.json().get("events", [])
-  if not event_data:
+  event_data = get_event_catalog(season).get(event_code)
+  if event_data is None:
     return None
 
-  event_data = event_data[0]
-
   # Filter by allowed event types
   event_type = int(event_data.get("type", -1))
-  if event_type not in valid_events:
+  if event_type not in settings.allowed_events:
     return None
 
-  return Event(event_data)
-
+  return Event(event_data, season)
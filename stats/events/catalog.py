@@ -0,0 +1,135 @@
+import threading
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from heapq import merge
+from datetime import date, datetime
+
+from stats.data.client import get_client
+
+
+class EventCatalog:
+    """
+    Every event of a season, downloaded with a single /{season}/events request and indexed by code,
+    region, type and division. Every list is kept in end date order so date ranges are found with a binary search.
+    """
+
+    def __init__(self, season: int, all_event_data: list[dict]):
+        """
+        :param season: FTC API season year
+        :param all_event_data: Events as returned by the FIRST API events endpoint
+        """
+        self.season = season
+
+        self.by_code: dict[str, dict] = {}
+        self.by_region: dict[str, list[dict]] = defaultdict(list)
+        self.by_type: dict[int, list[dict]] = defaultdict(list)
+        self.by_division: dict[str, list[dict]] = defaultdict(list)
+
+        by_end_date = sorted(all_event_data, key=event_end_date)
+        for event_data in by_end_date:
+            self.by_code[event_data['code']] = event_data
+            self.by_region[event_data.get('regionCode')].append(event_data)
+            self.by_type[int(event_data['type'])].append(event_data)
+            if event_data.get('divisionCode'):
+                self.by_division[event_data['divisionCode']].append(event_data)
+
+        self._end_dates = [event_end_date(event) for event in by_end_date]
+        self._by_end_date = by_end_date
+
+    def get(self, event_code: str) -> dict | None:
+        """
+        :param event_code: Valid FTC Event Code
+        :return: Event data for the code, None if the season has no such event
+        """
+        return self.by_code.get(event_code)
+
+    def ending_between(self, min_date: date = date.min, max_date: date = date.max) -> list[dict]:
+        """
+        :param min_date: Earliest end date to include
+        :param max_date: Latest end date to include
+        :return: Events ending within the range (inclusive), ordered by end date
+        """
+        start = bisect_left(self._end_dates, min_date)
+        end = bisect_right(self._end_dates, max_date)
+        return self._by_end_date[start:end]
+
+    def query(self, region: str = "", min_date: date = date.min, max_date: date = date.max,
+              event_types: list[int] = None) -> list[dict]:
+        """
+        Find events matching every given criteria
+        :param region: OPTIONAL, region code the events must be in
+        :param min_date: OPTIONAL, earliest end date
+        :param max_date: OPTIONAL, latest end date
+        :param event_types: OPTIONAL, allowed event types
+        :return: Matching events ordered by end date
+        """
+        if region:
+            events = self.by_region.get(region, [])
+        elif event_types is not None:
+            events = list(merge(*(self.by_type.get(int(event_type), []) for event_type in set(event_types)),
+                                key=event_end_date))
+        else:
+            return self.ending_between(min_date, max_date)
+
+        start = bisect_left(events, min_date, key=event_end_date)
+        end = bisect_right(events, max_date, key=event_end_date)
+        events = events[start:end]
+
+        # Only the region index was used
+        if region and event_types is not None:
+            allowed = set(event_types)
+            events = [event for event in events if int(event['type']) in allowed]
+
+        return events
+
+    def divisions(self, event_code: str) -> list[dict]:
+        """
+        :param event_code: Event code of a championship with divisions
+        :return: Division events of the event, empty if none
+        """
+        return self.by_division.get(event_code, [])
+
+    def __len__(self):
+        return len(self.by_code)
+
+
+def event_end_date(event_data: dict) -> date:
+    return datetime.fromisoformat(event_data['dateEnd']).date()
+
+
+def load_event_catalog(season: int) -> EventCatalog:
+    """
+    Download the season's events from the FIRST API
+    :param season: FTC API season year
+    :return: EventCatalog of the season
+    :raises ValueError: The events could not be downloaded, so no empty catalog is kept for the run
+    """
+    event_response = get_client().get(f"/{season}/events", use_cache=True, memoize=True)
+    if event_response.status_code != 200:
+        raise ValueError(f"The events of season {season} could not be downloaded "
+                         f"(status {event_response.status_code}).")
+    return EventCatalog(season, event_response.json().get('events', []))
+
+
+_catalogs: dict[int, EventCatalog] = {}
+_catalogs_lock = threading.Lock()
+
+
+def get_event_catalog(season: int) -> EventCatalog:
+    """
+    Get the event catalog of a season, downloading it the first time it is needed in a run
+    :param season: FTC API season year
+    :return: EventCatalog of the season
+    """
+    with _catalogs_lock:
+        if season not in _catalogs:
+            _catalogs[season] = load_event_catalog(season)
+        return _catalogs[season]
+
+
+def reset_event_catalogs():
+    """
+    Forget every loaded catalog so the next run downloads the event list again
+    """
+    with _catalogs_lock:
+        _catalogs.clear()
@@ -19,18 +19,19 @@ def flatten_team_data(team):
         'epa_total': team.epa_total,
         'auto_epa_total': team.epa_auto_total,
         'tele_epa_total': team.epa_tele_total,
-        'historical_epa': team.historical_epa,
-        'historical_auto_epa': team.historical_auto_epa,
-        'historical_tele_epa': team.historical_tele_epa,
+        'historical_epa': team.historical_epa.tolist(),
+        'historical_auto_epa': team.historical_auto_epa.tolist(),
+        'historical_tele_epa': team.historical_tele_epa.tolist(),
 
         'opr': team.opr,
         'opr_auto': team.opr_auto,
         'opr_tele': team.opr_tele,
         'opr_end': team.opr_end,
-        'historical_opr': team.historical_opr,
-        'historical_auto_opr': team.historical_auto_opr,
-        'historical_tele_opr': team.historical_tele_opr,
-        'historical_end_opr': team.historical_end_opr,
+        'historical_opr': team.historical_opr.tolist(),
+        'historical_auto_opr': team.historical_auto_opr.tolist(),
+        'historical_tele_opr': team.historical_tele_opr.tolist(),
+        'historical_end_opr': team.historical_end_opr.tolist(),
+        'opr_events': list(team.opr_events),
     }
 
 def export_team_data(team_data: dict[int, Team], path):
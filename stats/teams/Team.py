@@ -1,7 +1,31 @@
-from typing import Dict
+import sys
+from array import array
+from operator import attrgetter
+from typing import Dict, Iterable
+
+# Histories are stored as typed arrays of doubles instead of lists of boxed floats
+HISTORY_FIELDS = ('historical_epa', 'historical_auto_epa', 'historical_tele_epa',
+                  'historical_opr', 'historical_auto_opr', 'historical_tele_opr', 'historical_end_opr')
+
+
+def history_property(field: str) -> property:
+    """
+    Create a property storing a history as array('d'), accepting any iterable of numbers when set
+    :param field: Name of the slot backing the property
+    :return: Property object
+    """
+
+    def setter(self, values: Iterable[float]):
+        setattr(self, field, array('d', values or ()))
+
+    return property(attrgetter(field), setter)
 
 
 class Team:
+    __slots__ = ('team_number', 'name', '_matches', 'games_played', 'country', 'state_prov', 'city', 'home_region',
+                 'epa_total', 'epa_auto_total', 'epa_tele_total', 'opr', 'opr_auto', 'opr_tele', 'opr_end', 'opr_events',
+                 *(f'_{field}' for field in HISTORY_FIELDS))
+
     def __init__(self, team_number, name, country, state_prov, city, home_region):
         self.team_number = team_number
         self.name = name
@@ -26,11 +50,30 @@ class Team:
         self.historical_auto_opr = []
         self.historical_tele_opr = []
         self.historical_end_opr = []
+        # Event code of each OPR history point
+        self.opr_events = []
         self.opr = 0
         self.opr_auto = 0
         self.opr_tele = 0
         self.opr_end = 0
 
+    historical_epa = history_property('_historical_epa')
+    historical_auto_epa = history_property('_historical_auto_epa')
+    historical_tele_epa = history_property('_historical_tele_epa')
+    historical_opr = history_property('_historical_opr')
+    historical_auto_opr = history_property('_historical_auto_opr')
+    historical_tele_opr = history_property('_historical_tele_opr')
+    historical_end_opr = history_property('_historical_end_opr')
+
+    @property
+    def matches(self) -> list[str]:
+        return self._matches
+
+    @matches.setter
+    def matches(self, match_names: Iterable[str]):
+        # Every team at a match shares one copy of its name
+        self._matches = [sys.intern(match_name) for match_name in match_names or ()]
+
     def update(self, data: Dict):
         self.epa_total = data['epa_total']
         self.epa_auto_total = data['auto_epa_total']
@@ -46,11 +89,12 @@ class Team:
         self.historical_auto_opr = data['historical_auto_opr']
         self.historical_tele_opr = data['historical_tele_opr']
         self.historical_end_opr = data['historical_end_opr']
+        self.opr_events = list(data['opr_events'])
         self.matches = data['matches']
         self.games_played = data['games_played']
 
     def update_game_played(self, match_name):
-        self.matches.append(match_name)
+        self._matches.append(sys.intern(match_name))
         self.games_played += 1
 
     def update_epa(self, delta_epa, delta_epa_auto, delta_epa_tele):
@@ -63,30 +107,34 @@ class Team:
         """
         new_epa = self.epa_total + delta_epa
         self.epa_total = new_epa
-        self.historical_epa.append(new_epa)
+        self._historical_epa.append(new_epa)
 
         new_epa_auto = self.epa_auto_total + delta_epa_auto
         self.epa_auto_total = new_epa_auto
-        self.historical_auto_epa.append(new_epa_auto)
+        self._historical_auto_epa.append(new_epa_auto)
 
         new_epa_tele = self.epa_tele_total + delta_epa_tele
         self.epa_tele_total = new_epa_tele
-        self.historical_tele_epa.append(new_epa_tele)
+        self._historical_tele_epa.append(new_epa_tele)
 
 
-    def update_opr(self, opr_total, opr_auto, opr_tele, opr_end):
+    def update_opr(self, opr_total, opr_auto, opr_tele, opr_end, record_history=True, event_code=None):
         """
         Update all OPR values for current team object
         :param opr_total: Calculated new total OPR
         :param opr_auto: Calculated new Auto OPR
         :param opr_tele: Calculated new TeleOp OPR
         :param opr_end: Calculated new Endgame OPR
+        :param record_history: OPTIONAL, False to only update the current values without adding a history point
+        :param event_code: OPTIONAL, event the history point was calculated at
         :return: None
         """
-        self.historical_opr.append(float(opr_total))  # Connvert numpy floats to python floats
-        self.historical_auto_opr.append(float(opr_auto))
-        self.historical_tele_opr.append(float(opr_tele))
-        self.historical_end_opr.append(float(opr_end))
+        if record_history:
+            self._historical_opr.append(float(opr_total))  # Connvert numpy floats to python floats
+            self._historical_auto_opr.append(float(opr_auto))
+            self._historical_tele_opr.append(float(opr_tele))
+            self._historical_end_opr.append(float(opr_end))
+            self.opr_events.append(sys.intern(event_code) if event_code else None)
         self.opr = float(opr_total)
         self.opr_auto = float(opr_auto)
         self.opr_tele = float(opr_tele)
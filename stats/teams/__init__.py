@@ -1,9 +1,12 @@
-import requests
+from typing import Iterable
 
-from stats.data import get_config, get_auth
-from stats.data.api import get_team_from_nighthawks
+from stats.data.client import get_client
+from stats.data.settings import get_settings
 from stats.teams.Team import Team
 
+# Largest number of team numbers sent in a single IN (...) query
+TEAM_QUERY_CHUNK_SIZE = 1000
+
 
 def get_team_from_json(team_data: dict) -> Team:
     """
@@ -67,15 +70,17 @@ def get_team_from_json(team_data: dict) -> Team:
     return team
 
 
-def get_teams_at_event(event_code: str) -> list[int]:
+def get_teams_at_event(event_code: str, season: int = None) -> list[int]:
     """
     Retrieve a list of team numbers for teams at a given event code
     :param event_code: Valid FTC event code
+    :param season: OPTIONAL, season to query, defaults to the configured season
     :return: List off all team numbers at an event
     """
-    season = get_config()['season']
-    teams_response = requests.get(f"https://ftc-api.firstinspires.org/v2.0/{season}/teams?eventCode={event_code}",
-                                  auth=get_auth())
+    if season is None:
+        season = get_settings().season
+    teams_response = get_client().get(f"/{season}/teams", params={'eventCode': event_code}, use_cache=True,
+                                      memoize=True)
 
     if teams_response.status_code == 400:
         raise ValueError("The given event code could not be found.")
@@ -117,24 +122,46 @@ def get_team_data_from_events(event_codes: list[str]) -> dict[int, Team]:
     return team_data
 """
 
-def get_team_data_from_event(event_code: str) -> dict[int, Team]:
+def get_team_data_from_database(team_numbers: Iterable[int], chunk_size: int = TEAM_QUERY_CHUNK_SIZE) -> dict[int, Team]:
     """
-    Get team data for all teams at a given event
-    :param event_code: Valid FTC event code
-    :return: Dictionary of all team data at event (key=team number, value=team data object)
+    Load the saved statistics of many teams from the database, querying in chunks of team numbers.
+    Must be called within an app context
+    :param team_numbers: Team numbers to load, duplicates are ignored
+    :param chunk_size: OPTIONAL, largest number of team numbers per query
+    :return: Dictionary of team data for every team found (key=team number, value=team data object)
     """
-    team_number_list = get_teams_at_event(event_code)
+    # Move the import here to avoid circular import
+    from app.models import TeamMatchStatsModel, TeamModel
+
+    unique_team_numbers = sorted(set(team_numbers))
     team_data = {}
 
-    for team_number in team_number_list:
-        try:
-            team_data[team_number] = get_team_from_nighthawks(team_number)
-        except ValueError:
+    for start in range(0, len(unique_team_numbers), chunk_size):
+        chunk = unique_team_numbers[start:start + chunk_size]
+        histories = {}
+        for row in TeamMatchStatsModel.query.filter(TeamMatchStatsModel.team_number.in_(chunk)).order_by(
+                TeamMatchStatsModel.team_number, TeamMatchStatsModel.match_index):
+            histories.setdefault(row.team_number, []).append(row)
+
+        for team_model in TeamModel.query.filter(TeamModel.team_number.in_(chunk)):
+            team_data[team_model.team_number] = team_model.to_team(histories.get(team_model.team_number, []))
+
+    for team_number in unique_team_numbers:
+        if team_number not in team_data:
             print(f"Warning: Team {team_number} not found, skipping.")
 
     return team_data
 
 
+def get_team_data_from_event(event_code: str) -> dict[int, Team]:
+    """
+    Get team data for all teams at a given event
+    :param event_code: Valid FTC event code
+    :return: Dictionary of all team data at event (key=team number, value=team data object)
+    """
+    return get_team_data_from_database(get_teams_at_event(event_code))
+
+
 def get_team_data_from_events(event_codes: list[str]) -> dict[int, Team]:
     """
     Get team data for all teams from a given list of events
@@ -145,10 +172,4 @@ def get_team_data_from_events(event_codes: list[str]) -> dict[int, Team]:
     for event_code in event_codes:
         team_number_list += get_teams_at_event(event_code)
 
-    team_data = {}
-    for team_number in team_number_list:
-        try:
-            team_data[team_number] = get_team_from_nighthawks(team_number)
-        except ValueError:
-            print(f"Warning: Team {team_number} not found, skipping.")
-    return team_data
+    return get_team_data_from_database(team_number_list)
@@ -0,0 +1,148 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from stats.data.client import get_client
+from stats.data.settings import get_settings
+
+DEFAULT_DIRECTORY_DIR = os.path.join(tempfile.gettempdir(), "nighthawks-stats")
+
+# Order of the fields stored for each team in the directory table
+TEAM_FIELDS = ('nameShort', 'country', 'stateProv', 'city', 'homeRegion')
+
+
+class TeamDirectory:
+    """
+    Name and location of every team registered in a season, downloaded in bulk from the paginated
+    /{season}/teams listing and kept as a table indexed by team number. The table is persisted to disk
+    and downloaded again once it is older than the TTL.
+    """
+
+    def __init__(self, season: int, path: str, ttl_seconds: float = 24 * 60 * 60, workers: int = 4):
+        """
+        :param season: FTC API season year
+        :param path: JSON file the table is persisted to between runs
+        :param ttl_seconds: Age after which the table is downloaded again
+        :param workers: Threads used to download pages
+        """
+        self.season = season
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.workers = workers
+
+        self._teams: dict[int, tuple] = {}
+        self._fetched_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self, team_number: int) -> dict | None:
+        """
+        Look up a team's name and location
+        :param team_number: Valid FTC Team Number
+        :return: Dictionary shaped like a FIRST API team (nameShort, country, stateProv, city, homeRegion),
+                 None if the team is not registered for the season
+        """
+        self._ensure_fresh()
+        row = self._teams.get(team_number)
+        if row is None:
+            return None
+        return dict(zip(TEAM_FIELDS, row))
+
+    def add(self, team_data: dict):
+        """
+        Add a single team downloaded outside the bulk listing (e.g. registered after the last refresh)
+        :param team_data: Team as returned by the FIRST API
+        """
+        with self._lock:
+            self._teams[team_data['teamNumber']] = tuple(team_data.get(field) for field in TEAM_FIELDS)
+
+    def __len__(self):
+        self._ensure_fresh()
+        return len(self._teams)
+
+    def _ensure_fresh(self):
+        if time.time() - self._fetched_at < self.ttl_seconds:
+            return
+
+        with self._lock:
+            if time.time() - self._fetched_at < self.ttl_seconds:
+                return
+            if not self._load():
+                self._refresh()
+                self._save()
+
+    def _load(self) -> bool:
+        try:
+            with open(self.path, 'r') as file:
+                data = json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return False
+
+        if data.get('season') != self.season or time.time() - data.get('fetched_at', 0) >= self.ttl_seconds:
+            return False
+
+        self._teams = {int(team_number): tuple(row) for team_number, row in data['teams'].items()}
+        self._fetched_at = data['fetched_at']
+        return True
+
+    def _refresh(self):
+        first_page = self._get_page(1)
+        page_total = first_page.get('pageTotal', 1)
+
+        pages = [first_page]
+        if page_total > 1:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                pages += list(executor.map(self._get_page, range(2, page_total + 1)))
+
+        teams = {}
+        for page in pages:
+            for team_data in page['teams']:
+                teams[team_data['teamNumber']] = tuple(team_data.get(field) for field in TEAM_FIELDS)
+
+        self._teams = teams
+        self._fetched_at = time.time()
+        print(f"Team directory: downloaded {len(teams)} teams in {page_total} pages")
+
+    def _get_page(self, page: int) -> dict:
+        response = get_client().get(f"/{self.season}/teams", params={'page': page}, use_cache=True)
+        if response.status_code != 200:
+            raise ValueError(f"Page {page} of the team listing could not be retrieved (status {response.status_code}).")
+        return response.json()
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        data = {'season': self.season, 'fetched_at': self._fetched_at, 'teams': self._teams}
+
+        # Write then rename so a concurrent reader never sees a partial file
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'w') as file:
+            json.dump(data, file, separators=(',', ':'))
+        os.replace(temp_path, self.path)
+
+
+_directories: dict[int, TeamDirectory] = {}
+_directories_lock = threading.Lock()
+
+
+def get_team_directory(season: int = None) -> TeamDirectory:
+    """
+    Get the shared team directory for a season, configured from the [teams] section of the config
+    :param season: OPTIONAL, season year, defaults to the configured season
+    :return: TeamDirectory for the season
+    """
+    settings = get_settings(season)
+    season = settings.season
+
+    with _directories_lock:
+        if season not in _directories:
+            teams_config = settings.section('teams')
+            directory_dir = teams_config.get('directory_path') or DEFAULT_DIRECTORY_DIR
+            _directories[season] = TeamDirectory(
+                season=season,
+                path=os.path.join(directory_dir, f"teams-{season}.json"),
+                ttl_seconds=teams_config.get('directory_ttl_hours', 24) * 60 * 60,
+                workers=settings.section('pipeline').get('workers', 4)
+            )
+        return _directories[season]
@@ -0,0 +1,45 @@
+"""
+The vectorized EPA engine must give the same results as the per-team objects (update_epa).
+Run with python -m pytest from the repository root.
+"""
+import numpy as np
+import pytest
+
+from stats.calculations.benchmarks import check_epa_parity, create_starting_teams, create_synthetic_event
+from stats.calculations.epa import EpaEngine, update_epa
+from stats.calculations.matrix import build_game_matrix
+
+EPA_FIELDS = ('epa_total', 'epa_auto_total', 'epa_tele_total')
+HISTORY_FIELDS = ('historical_epa', 'historical_auto_epa', 'historical_tele_epa')
+
+
+@pytest.fixture
+def event():
+    team_list, matches, event_data = create_synthetic_event(24, 48, seed=7, event_code="PARITY")
+    return [(team_list, build_game_matrix(matches, team_list), event_data)]
+
+
+def test_engines_match_on_an_event(event):
+    object_teams = create_starting_teams(event)
+    for team_list, game_matrix, event_data in event:
+        update_epa(team_list, game_matrix, event_data, object_teams)
+
+    engine_teams = create_starting_teams(event)
+    engine = EpaEngine()
+    for team_list, game_matrix, event_data in event:
+        engine.process_event(team_list, game_matrix, event_data, engine_teams)
+    engine.write_back(engine_teams)
+
+    for team_number, expected in object_teams.items():
+        actual = engine_teams[team_number]
+        assert actual.matches == expected.matches
+        assert actual.games_played == expected.games_played
+        for field in EPA_FIELDS:
+            assert getattr(actual, field) == pytest.approx(getattr(expected, field), abs=1e-9)
+        for field in HISTORY_FIELDS:
+            np.testing.assert_allclose(getattr(actual, field), getattr(expected, field), atol=1e-9)
+
+
+def test_engines_match_across_a_season():
+    # Teams play at several events, so the engine's state carries from one event to the next
+    assert check_epa_parity(num_events=12, num_teams=120) < 1e-9